@@ -12,4 +12,4 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-__version__ = '4.33.0' # change in pyproject.toml too
+__version__ = '4.34.0' # change in pyproject.toml too
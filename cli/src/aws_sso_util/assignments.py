@@ -27,6 +27,8 @@ from .utils import configure_logging
 
 LOGGER = logging.getLogger(__name__)
 
+MAX_CONCURRENT_ASSIGNMENT_REQUESTS = 8
+
 def get_principal_filter(group_values, user_values):
     def filter(type, id, name):
         if not (group_values or user_values):
@@ -163,7 +165,8 @@ def assignments(
         get_principal_names=lookup_names,
         get_permission_set_names=lookup_names,
         get_target_names=lookup_names,
-        ou_recursive=ou_recursive)
+        ou_recursive=ou_recursive,
+        max_workers=MAX_CONCURRENT_ASSIGNMENT_REQUESTS)
 
     if header:
         fields = list(Assignment._fields)
@@ -13,7 +13,6 @@
 
 import logging
 import sys
-import re
 import pathlib
 import getpass
 import traceback
@@ -39,25 +38,12 @@ from aws_sso_lib import __version__ as aws_sso_lib_version
 
 LOGGER = logging.getLogger(__name__)
 
-def get_specifier_parts(specifier):
-    parts = []
-    if specifier.start_url:
-        parts.extend([
-            f"{specifier.start_url}",
-            f"from {specifier.start_url_source}"
-        ])
-    if specifier.region:
-        if specifier.start_url:
-            parts.append("and")
-        parts.extend([
-            "region",
-            f"{specifier.region}",
-            f"from {specifier.region_source}"
-        ])
-    return parts
-
-def join_parts(parts):
-    return re.sub(r" (?=[,\(\)])", "", " ".join(parts))
+def format_specifier(specifier):
+    start_url_str = f"{specifier.start_url} from {specifier.start_url_source}" if specifier.start_url else ""
+    region_str = f"region {specifier.region} from {specifier.region_source}" if specifier.region else ""
+    if start_url_str and region_str:
+        return f"{start_url_str} and {region_str}"
+    return start_url_str or region_str
 
 def extract_error(e, e_type):
     if isinstance(e, e_type):
@@ -168,65 +154,38 @@ def check(
 
     if not instances:
         if not all_instances:
-            parts = [
-                "Did not find Identity Center instance"
-            ]
             if specifier:
-                parts.append("(with specifier")
-                parts.extend(get_specifier_parts(specifier))
-                parts.append(")")
-            LOGGER.error(join_parts(parts))
+                LOGGER.error(f"Did not find Identity Center instance (with specifier {format_specifier(specifier)})")
+            else:
+                LOGGER.error("Did not find Identity Center instance")
             sys.exit(101)
         else:
-            parts = [
-                "Did not find Identity Center instance matching specifier"
-            ]
-            parts.extend(get_specifier_parts(specifier))
-            parts.append(f"from instances {SSOInstance.to_strs(all_instances, region=True)}")
-            LOGGER.error(join_parts(parts))
+            LOGGER.error(
+                f"Did not find Identity Center instance matching specifier {format_specifier(specifier)} "
+                + f"from instances {SSOInstance.to_strs(all_instances, region=True)}")
             sys.exit(102)
 
     if len(instances) > 1:
-        parts = [
-            f"Did not find unique Identity Center instance. Found {len(instances)} instances"
-        ]
+        msg = f"Did not find unique Identity Center instance. Found {len(instances)} instances"
         if not specifier:
-            parts.append("with no specifier:")
-            parts.append(f"{SSOInstance.to_strs(all_instances, region=True)}")
+            msg += f" with no specifier: {SSOInstance.to_strs(all_instances, region=True)}"
         else:
-            parts.append("matching specifier")
-            parts.extend(get_specifier_parts(specifier))
-            parts.append(f", from instances {SSOInstance.to_strs(all_instances, region=True)}")
-        LOGGER.error(join_parts(parts))
+            msg += (f" matching specifier {format_specifier(specifier)}"
+                + f", from instances {SSOInstance.to_strs(all_instances, region=True)}")
+        LOGGER.error(msg)
         sys.exit(103)
 
     instance = instances[0]
 
     if instance_details:
-        parts = [
-            f"Identity Center instance",
-            f"start URL {instance.start_url} from {instance.start_url_source}",
-            f"and",
-            f"region {instance.region} from {instance.region_source}"
-        ]
-        if specifier:
-            parts.append(", from specifier")
-            if specifier.start_url:
-                parts.extend([
-                    f"{specifier.start_url}",
-                    f"from {specifier.start_url_source}"
-                ])
-            if specifier.region:
-                if specifier.start_url:
-                    parts.append("and")
-                parts.extend([
-                    "region",
-                    f"{specifier.region}",
-                    f"from {specifier.region_source}"
-                ])
-        if len(all_instances) > 1:
-            parts.append(f", from instances {SSOInstance.to_strs(all_instances, region=True)}")
-        LOGGER.info(join_parts(parts))
+        if LOGGER.isEnabledFor(logging.INFO):
+            msg = (f"Identity Center instance start URL {instance.start_url} from {instance.start_url_source}"
+                + f" and region {instance.region} from {instance.region_source}")
+            if specifier:
+                msg += f", from specifier {format_specifier(specifier)}"
+            if len(all_instances) > 1:
+                msg += f", from instances {SSOInstance.to_strs(all_instances, region=True)}"
+            LOGGER.info(msg)
     else:
         LOGGER.info(f"Identity Center instance: {instance.start_url} ({instance.region})")
 
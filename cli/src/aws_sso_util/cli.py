@@ -11,68 +11,72 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 
+import importlib
+
 import click
 
 from . import __version__
 
-from .assignments import assignments
-from .cfn import generate_template
-from .check import check
-from .configure_profile import configure_profile
-from .credential_process import credential_process
-from .deploy_macro import deploy_macro
-from .login import login
-from .logout import logout
-from .lookup import lookup
-from .populate_profiles import populate_profiles
-from .roles import roles
-from .run_as import run_as
-from .console import launch, get_config_token, launch_from_config
-
-@click.group(name="aws-sso-util")
+class LazyGroup(click.Group):
+    """A group that only imports a subcommand's module when the subcommand is used.
+
+    lazy_commands maps a command name to "module:attribute", with the module relative to this package.
+    """
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name not in self.lazy_commands:
+            return super().get_command(ctx, cmd_name)
+        module_name, attr_name = self.lazy_commands[cmd_name].split(":")
+        module = importlib.import_module(f".{module_name}", __package__)
+        return getattr(module, attr_name)
+
+@click.group(name="aws-sso-util", cls=LazyGroup, lazy_commands={
+    "login": "login:login",
+    "logout": "logout:logout",
+    "roles": "roles:roles",
+    "check": "check:check",
+    "run-as": "run_as:run_as",
+    "credential-process": "credential_process:credential_process",
+})
 @click.version_option(version=__version__, message='%(version)s')
 def cli():
     pass
 
-@cli.group()
+@cli.group(cls=LazyGroup, lazy_commands={
+    "profile": "configure_profile:configure_profile",
+    "populate": "populate_profiles:populate_profiles",
+})
 def configure():
     """Commands to set up ~/.aws/config."""
     pass
 
-configure.add_command(configure_profile, "profile")
-configure.add_command(populate_profiles, "populate")
-
-cli.add_command(login)
-cli.add_command(logout)
-cli.add_command(roles)
-cli.add_command(check)
-cli.add_command(run_as)
-
-@cli.group()
+@cli.group(cls=LazyGroup, lazy_commands={
+    "launch": "console:launch",
+    "get-config-token": "console:get_config_token",
+    "launch-from-config": "console:launch_from_config",
+})
 def console():
     """Commands for launching the AWS console in a browser."""
     pass
 
-console.add_command(launch)
-console.add_command(get_config_token)
-console.add_command(launch_from_config)
-
-@cli.group()
+@cli.group(cls=LazyGroup, lazy_commands={
+    "lookup": "lookup:lookup",
+    "assignments": "assignments:assignments",
+    # "deploy-macro": "deploy_macro:deploy_macro",
+    "cfn": "cfn:generate_template",
+})
 def admin():
     """Commands for IAM Identity Center administration."""
     pass
 
-admin.add_command(lookup)
-admin.add_command(assignments)
-
-# admin.add_command(deploy_macro)
-admin.add_command(generate_template, "cfn")
-
-cli.add_command(credential_process)
-
 _list_commands = cli.list_commands
 def list_commands(ctx):
     return [c for c in _list_commands(ctx) if c != "credential-process"]
 
 cli.list_commands = list_commands
-
@@ -14,13 +14,14 @@
 
 import argparse
 import os
+import shutil
 import subprocess
 import sys
 import logging
 import textwrap
 
 import botocore
-from botocore.exceptions import ProfileNotFound
+from botocore.credentials import JSONFileCache
 
 import click
 
@@ -28,7 +29,7 @@ from aws_sso_lib.config import find_instances, SSOInstance
 from aws_sso_lib.config_file_writer import write_values
 from aws_sso_lib.compat import shell_quote
 
-from .utils import configure_logging, get_instance, GetInstanceError
+from .utils import configure_logging, get_instance, GetInstanceError, env_var_is_true, parse_config_defaults
 
 LOGGER = logging.getLogger(__name__)
 
@@ -41,6 +42,11 @@ CREDENTIAL_PROCESS_NAME_VAR= "AWS_SSO_CREDENTIAL_PROCESS_NAME"
 
 SET_CREDENTIAL_PROCESS_DEFAULT = True
 
+CLI_VERSION_CACHE_DIR = os.path.expanduser(
+    os.path.join("~", ".aws", "cli", "cache")
+)
+CLI_VERSION_CACHE_KEY = "aws-sso-util-aws-cli-version"
+
 @click.command("profile")
 @click.argument("profile", metavar="PROFILE_NAME")
 @click.option("--sso-start-url", "-u", metavar="URL", help="Your Identity Center start URL")
@@ -98,10 +104,7 @@ def configure_profile(
     sso_start_url = instance.start_url if instance else None
     sso_region    = instance.region    if instance else None
 
-    if config_default:
-        config_default = dict(v.split("=", 1) for v in config_default)
-    else:
-        config_default = {}
+    config_default = parse_config_defaults(config_default)
 
     session = botocore.session.Session(profile=profile)
 
@@ -109,12 +112,12 @@ def configure_profile(
     existing_profile = False
     existing_config = {}
     if existing_config_action != "discard":
-        try:
-            existing_config = session.get_scoped_config()
+        existing_config = get_existing_profile_config(session, profile)
+        if existing_config is not None:
             config_values.update(existing_config)
             existing_profile = True
-        except ProfileNotFound:
-            pass
+        else:
+            existing_config = {}
 
     if sso_start_url:
         config_values["sso_start_url"] = sso_start_url
@@ -148,7 +151,7 @@ def configure_profile(
 
     if credential_process is not None:
         set_credential_process = credential_process
-    elif os.environ.get(DISABLE_CREDENTIAL_PROCESS_VAR, "").lower() in ["1", "true"]:
+    elif env_var_is_true(DISABLE_CREDENTIAL_PROCESS_VAR):
         set_credential_process = False
     else:
         set_credential_process = SET_CREDENTIAL_PROCESS_DEFAULT
@@ -182,8 +185,7 @@ def configure_profile(
         return
 
     try:
-        result = subprocess.run(["aws", "--version"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        cli_version = parse_cli_version(result.stdout.decode("utf-8"))
+        cli_version = detect_cli_version()
         if cli_version.startswith("1."):
             LOGGER.warn(textwrap.dedent(f"""\
             Your profile has been written, but is not complete.
@@ -200,7 +202,7 @@ def configure_profile(
             https://docs.aws.amazon.com/cli/latest/userguide/install-cliv2.html"""))
         sys.exit(2)
 
-    result = subprocess.run(f"aws configure sso --profile {shell_quote(profile)}", shell=True)
+    result = subprocess.run(["aws", "configure", "sso", "--profile", profile])
 
     if result.returncode:
         # this doesn't appear to work
@@ -208,6 +210,45 @@ def configure_profile(
         # write_values(session, profile, existing_config)
         sys.exit(10+result.returncode)
 
+def get_existing_profile_config(session, profile_name):
+    """Get the existing config for a profile, or None if the profile doesn't exist.
+
+    The session is not required to be configured for the profile.
+    The config file is parsed once per session, so a single session can be
+    used to look up many profiles."""
+    return session.full_config["profiles"].get(profile_name)
+
+def detect_cli_version():
+    """Get the version of the AWS CLI on the path.
+
+    The result is cached on disk, keyed on the path and modification time
+    of the aws executable, so the CLI only gets run when it changes.
+    Raises FileNotFoundError if the AWS CLI is not installed."""
+    path = shutil.which("aws")
+    if not path:
+        raise FileNotFoundError("aws")
+    cache_key = [path, os.stat(path).st_mtime_ns]
+
+    cache = JSONFileCache(CLI_VERSION_CACHE_DIR)
+    try:
+        if CLI_VERSION_CACHE_KEY in cache:
+            cache_entry = cache[CLI_VERSION_CACHE_KEY]
+            if cache_entry.get("key") == cache_key:
+                LOGGER.debug(f"Using cached AWS CLI version {cache_entry['version']}")
+                return cache_entry["version"]
+    except Exception:
+        LOGGER.debug("Failed to load AWS CLI version from cache", exc_info=True)
+
+    result = subprocess.run([path, "--version"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    cli_version = parse_cli_version(result.stdout.decode("utf-8"))
+
+    try:
+        cache[CLI_VERSION_CACHE_KEY] = {"key": cache_key, "version": cli_version}
+    except Exception:
+        LOGGER.debug("Failed to cache AWS CLI version", exc_info=True)
+
+    return cli_version
+
 def parse_cli_version(output):
     d = dict(part.split("/", 1) for part in output.split(" "))
     LOGGER.debug(f"AWS CLI version info: {d}")
@@ -16,24 +16,32 @@ import sys
 import json
 import webbrowser
 import urllib.parse
+import urllib.request
+import urllib.error
 import os
 import base64
+import socket
+from functools import lru_cache
 from typing import Optional, List, Dict
 
-import requests
-
 import click
 
 from aws_sso_lib.sso import get_boto3_session, login
 
-from .utils import configure_logging, get_instance, GetInstanceError
+from .utils import configure_logging, get_instance, GetInstanceError, env_var_is_true
 
 LOGGER = logging.getLogger(__name__)
 
+_TOKEN_ENCODER = json.JSONEncoder(ensure_ascii=True, separators=(',', ':'))
+
+_FEDERATION_REQUEST_TIMEOUT = 10
+
+_LOGOUT_REDIRECT = urllib.parse.quote_plus("https://aws.amazon.com/premiumsupport/knowledge-center/sign-out-account/?from_aws_sso_util_logout")
+
+@lru_cache(maxsize=32)
 def get_logout_url(region: Optional[str]=None):
-    redirect = urllib.parse.quote_plus("https://aws.amazon.com/premiumsupport/knowledge-center/sign-out-account/?from_aws_sso_util_logout")
     if not region or region == "us-east-1":
-        return f"https://signin.aws.amazon.com/oauth?Action=logout&redirect_uri={redirect}"
+        return f"https://signin.aws.amazon.com/oauth?Action=logout&redirect_uri={_LOGOUT_REDIRECT}"
 
     if region == "us-gov-east-1":
         return "https://us-gov-east-1.signin.amazonaws-us-gov.com/oauth?Action=logout"
@@ -41,8 +49,9 @@ def get_logout_url(region: Optional[str]=None):
     if region == "us-gov-west-1":
         return "https://signin.amazonaws-us-gov.com/oauth?Action=logout"
 
-    return f"https://{region}.signin.aws.amazon.com/oauth?Action=logout&redirect_uri={redirect}"
+    return f"https://{region}.signin.aws.amazon.com/oauth?Action=logout&redirect_uri={_LOGOUT_REDIRECT}"
 
+@lru_cache(maxsize=32)
 def get_federation_endpoint(region: Optional[str]=None):
     if not region or region == "us-east-1":
         return "https://signin.aws.amazon.com/federation"
@@ -55,6 +64,7 @@ def get_federation_endpoint(region: Optional[str]=None):
 
     return f"https://{region}.signin.aws.amazon.com/federation"
 
+@lru_cache(maxsize=32)
 def get_destination_base_url(region: Optional[str]=None):
     if region and region.startswith("us-gov-"):
         #TODO: regional?
@@ -64,6 +74,7 @@ def get_destination_base_url(region: Optional[str]=None):
     else:
         return "https://console.aws.amazon.com/"
 
+@lru_cache(maxsize=32)
 def get_destination(path: Optional[str]=None, region: Optional[str]=None, override_region_in_destination: bool=False):
     base = get_destination_base_url(region=region)
 
@@ -78,17 +89,19 @@ def get_destination(path: Optional[str]=None, region: Optional[str]=None, overri
     if not region:
         return url
 
-    parts = list(urllib.parse.urlsplit(url))
-    query_params = urllib.parse.parse_qsl(parts[3])
+    parts = urllib.parse.urlsplit(url)
     if override_region_in_destination:
-        query_params = [(k, v) for k, v in query_params if k != "region"]
+        query_params = [(k, v) for k, v in urllib.parse.parse_qsl(parts.query) if k != "region"]
         query_params.append(("region", region))
-    elif not any(k == "region" for k, _ in query_params):
-        query_params.append(("region", region))
-    query_str = urllib.parse.urlencode(query_params)
-    parts[3] = query_str
+        query_str = urllib.parse.urlencode(query_params)
+    elif any(param.partition("=")[0] == "region" for param in parts.query.split("&")):
+        return url
+    else:
+        # append the region without re-encoding the existing query
+        region_param = urllib.parse.urlencode({"region": region})
+        query_str = f"{parts.query}&{region_param}" if parts.query else region_param
 
-    url = urllib.parse.urlunsplit(parts)
+    url = urllib.parse.urlunsplit(parts._replace(query=query_str))
 
     return url
 
@@ -130,7 +143,7 @@ def launch(
 
     logout_first_from_env = False
     if logout_first is None:
-        logout_first = os.environ.get("AWS_CONSOLE_LOGOUT_FIRST", "").lower() in ["true", "1"]
+        logout_first = env_var_is_true("AWS_CONSOLE_LOGOUT_FIRST")
         logout_first_from_env = True
 
     if logout_first and not open_url:
@@ -182,19 +195,61 @@ TOKEN_KEY_MAPPING = [
     ("duration", "dur"),
 ]
 
+_TO_TOKEN_KEY = {k: token_k for k, token_k in TOKEN_KEY_MAPPING}
+_FROM_TOKEN_KEY = {token_k: k for k, token_k in TOKEN_KEY_MAPPING}
+
+_ALL_TOKEN_KEYS = frozenset(_TO_TOKEN_KEY)
+
+# the token keys that are passed on to _launch_console
+_LAUNCH_PARAM_KEYS = frozenset([
+    "sso_start_url",
+    "sso_region",
+    "account_id",
+    "role_name",
+    "federation_endpoint",
+    "issuer",
+    "destination",
+    "region",
+    "duration",
+])
+
 def to_token_key(key):
-    for k, token_k in TOKEN_KEY_MAPPING:
-        if k == key:
-            return token_k
     # do not allow unknown keys in an outgoing token
-    raise KeyError(key)
+    return _TO_TOKEN_KEY[key]
 
 def from_token_key(token_key):
-    for k, token_k in TOKEN_KEY_MAPPING:
-        if token_k == token_key:
-            return k
     # allow unknown keys in an incoming token
-    return token_key
+    return _FROM_TOKEN_KEY.get(token_key, token_key)
+
+def _build_token_payload(*,
+        sso_start_url,
+        sso_region,
+        federation_endpoint,
+        destination,
+        account_id=None,
+        role_name=None,
+        region=None,
+        duration=None,
+        issuer=None):
+    """Build a token payload directly in compact form (see TOKEN_KEY_MAPPING)"""
+    token_payload = {
+        "v": "1",
+        "ssourl": sso_start_url,
+        "ssoreg": sso_region,
+        "url": federation_endpoint,
+        "dst": destination,
+    }
+    if account_id:
+        token_payload["acc"] = account_id
+    if role_name:
+        token_payload["rol"] = role_name
+    if region:
+        token_payload["reg"] = region
+    if duration:
+        token_payload["dur"] = duration
+    if issuer:
+        token_payload["iss"] = issuer
+    return token_payload
 
 @click.command("get-config-token")
 @click.option("--sso-start-url", "-u", metavar="URL", help="Your Identity Center start URL")
@@ -237,32 +292,23 @@ def get_config_token(
     federation_endpoint = get_federation_endpoint(region=region)
     destination = get_destination(path=destination_path, region=region, override_region_in_destination=override_region_in_destination)
 
-    token_data = {
-        "version": "1",
-        "sso_start_url": instance.start_url,
-        "sso_region": instance.region,
-        "federation_endpoint": federation_endpoint,
-        "destination": destination,
-    }
-    if account_id:
-        token_data["account_id"] = account_id
-    if role_name:
-        token_data["role_name"] = role_name
-    if region:
-        token_data["region"] = region
-    if duration:
-        token_data["duration"] = duration
-
     # unless specifically provided, issuer should be set when login actually happens
-    if issuer:
-        token_data["issuer"] = issuer
-
-    # convert to compact form
-    token_payload = dict((to_token_key(key), value) for key, value in token_data.items())
+    token_payload = _build_token_payload(
+        sso_start_url=instance.start_url,
+        sso_region=instance.region,
+        federation_endpoint=federation_endpoint,
+        destination=destination,
+        account_id=account_id,
+        role_name=role_name,
+        region=region,
+        duration=duration,
+        issuer=issuer,
+    )
 
-    LOGGER.debug("Token payload: " + json.dumps(token_payload))
+    if LOGGER.isEnabledFor(logging.DEBUG):
+        LOGGER.debug("Token payload: " + json.dumps(token_payload))
 
-    serialized_json_bytes = json.dumps(token_payload, ensure_ascii=True, separators=(',', ':')).encode("utf-8")
+    serialized_json_bytes = _TOKEN_ENCODER.encode(token_payload).encode("utf-8")
     base64_encoded_bytes = base64.urlsafe_b64encode(serialized_json_bytes)
     token = str(base64_encoded_bytes, "ascii")
     LOGGER.info(token)
@@ -295,7 +341,7 @@ def launch_from_config(
 
     logout_first_from_env = False
     if logout_first is None:
-        logout_first = os.environ.get("AWS_CONSOLE_LOGOUT_FIRST", "").lower() in ["true", "1"]
+        logout_first = env_var_is_true("AWS_CONSOLE_LOGOUT_FIRST")
         logout_first_from_env = True
 
     if logout_first and not open_url:
@@ -305,28 +351,16 @@ def launch_from_config(
         else:
             raise click.UsageError("--logout-first requires --open")
 
-    param_keys = {
-        "sso_start_url",
-        "sso_region",
-        "account_id",
-        "role_name",
-        "federation_endpoint",
-        "issuer",
-        "destination",
-        "region",
-        "duration",
-    }
-
-    all_keys = set(k for k, v in TOKEN_KEY_MAPPING)
-
     # parse the token
     try:
-        token_payload = json.loads(base64.urlsafe_b64decode(config_token))
+        serialized_json = base64.urlsafe_b64decode(config_token).decode("utf-8")
+        # log the decoded JSON as-is rather than re-serializing it
+        LOGGER.debug("Token payload: " + serialized_json)
+        token_payload = json.loads(serialized_json)
         if not isinstance(token_payload, dict):
             raise ValueError("Invalid format")
-        LOGGER.debug("Token payload: " + json.dumps(token_payload))
         # convert from compact form
-        token_data = dict((from_token_key(key), value) for key, value in token_payload.items())
+        token_data = {_FROM_TOKEN_KEY.get(key, key): value for key, value in token_payload.items()}
     except Exception as e:
         LOGGER.error(f"The config token is invalid: {e}")
         sys.exit(1)
@@ -349,13 +383,12 @@ def launch_from_config(
         token_data["role_name"] = role_name
 
     # check for keys we don't understand
-    token_data_keys = set(token_data.keys())
-    unknown_keys = token_data_keys - all_keys
+    unknown_keys = token_data.keys() - _ALL_TOKEN_KEYS
     if unknown_keys:
         LOGGER.warning(f"The config token contains unknown keys: {', '.join(unknown_keys)}")
 
     # filter down to args for _launch_console
-    params = dict((k, v) for k, v in token_data.items() if k in param_keys)
+    params = {k: v for k, v in token_data.items() if k in _LAUNCH_PARAM_KEYS}
 
     return _launch_console(
         open_url=open_url,
@@ -409,14 +442,22 @@ def _launch_console(
     if duration is not None:
         get_signin_token_payload["SessionDuration"] = duration * 60
 
-    response = requests.post(federation_endpoint, data=get_signin_token_payload)
-
-    if response.status_code != 200:
+    request_data = urllib.parse.urlencode(get_signin_token_payload).encode("ascii")
+    try:
+        with urllib.request.urlopen(federation_endpoint, data=request_data, timeout=_FEDERATION_REQUEST_TIMEOUT) as response:
+            response_body = response.read()
+    except urllib.error.HTTPError as e:
+        LOGGER.error("Could not get signin token")
+        LOGGER.debug(f"{e.code}\n{e.read().decode('utf-8', errors='replace')}")
+        sys.exit(2)
+    except (urllib.error.URLError, socket.timeout) as e:
+        # a timeout while connecting is wrapped in a URLError, but one while
+        # reading the response is raised directly
         LOGGER.error("Could not get signin token")
-        LOGGER.debug(response.status_code + "\n" + response.text)
+        LOGGER.debug(f"{e}")
         sys.exit(2)
 
-    token = response.json()["SigninToken"]
+    token = json.loads(response_body)["SigninToken"]
 
     get_login_url_params = {
         "Action": "login",
@@ -425,12 +466,7 @@ def _launch_console(
         "SigninToken": token
     }
 
-    request = requests.Request(method="GET", url=federation_endpoint,
-        params=get_login_url_params)
-
-    prepared_request = request.prepare()
-
-    login_url = prepared_request.url
+    login_url = f"{federation_endpoint}?{urllib.parse.urlencode(get_login_url_params)}"
 
     if print_url:
         LOGGER.info(login_url)
@@ -22,48 +22,58 @@ import json
 import logging
 import datetime
 
-from botocore.session import Session
-from botocore.exceptions import ClientError
-
 import click
 
-from aws_sso_lib.sso import get_credentials
 from aws_sso_lib.exceptions import InvalidSSOConfigError, AuthDispatchError, AuthenticationNeededError, UnauthorizedSSOTokenError
 
+from .utils import env_var_is_true
+
 LOG_FILE = os.path.expanduser(
     os.path.join("~", ".aws", "sso", "aws-sso-credential-process-log.txt")
 )
 
 LOGGER = logging.getLogger(__name__)
 
-CONFIG_VARS = [
-    ("start url", "sso_start_url"),
-    ("SSO region", "sso_region"),
-    ("account", "sso_account_id"),
-    ("role", "sso_role_name")
-]
+_OUTPUT_ENCODER = json.JSONEncoder(separators=(",", ":"))
+
+# config var name -> friendly name
+CONFIG_VARS = {
+    "sso_start_url": "start url",
+    "sso_region": "SSO region",
+    "sso_account_id": "account",
+    "sso_role_name": "role",
+}
+
+REQUIRED_CONFIG_VARS = frozenset(["sso_start_url", "sso_region", "sso_account_id", "sso_role_name"])
 
 def get_config(arg_config, profile_config):
     sso_config = {}
-    missing_vars = []
-    for friendly_name, config_var_name in CONFIG_VARS:
+    missing_required_vars = []
+    for config_var_name, friendly_name in CONFIG_VARS.items():
         if arg_config.get(config_var_name):
             sso_config[config_var_name] = arg_config[config_var_name]
-        elif config_var_name not in profile_config:
-            missing_vars.append((friendly_name, config_var_name))
-            sso_config[config_var_name] = None
-        else:
+        elif config_var_name in profile_config:
             sso_config[config_var_name] = profile_config[config_var_name]
+        else:
+            sso_config[config_var_name] = None
+            if config_var_name in REQUIRED_CONFIG_VARS:
+                missing_required_vars.append(friendly_name)
 
-    required_vars = ["sso_start_url", "sso_region", "sso_account_id", "sso_role_name"]
-
-    missing_requred_vars = [v[0] for v in missing_vars if v[1] in required_vars]
-    if missing_requred_vars:
+    if missing_required_vars:
         raise InvalidSSOConfigError(
-            "Missing " + ", ".join(missing_requred_vars)
+            "Missing " + ", ".join(missing_required_vars)
         )
     return sso_config
 
+def get_from_env(value, var_name, friendly_name):
+    """Return the value if it was given, otherwise the (non-empty) env var value, if any"""
+    if value is not None:
+        return value
+    env_value = os.environ.get(var_name)
+    if not env_value:
+        return None
+    LOGGER.debug("Using {} from env: {}".format(friendly_name, env_value))
+    return env_value
 
 @click.command("credential-process")
 @click.option("--profile", help="Extract settings from the given profile")
@@ -93,32 +103,29 @@ def credential_process(
 
     This line is automatically added by aws-sso-util configure commands.
     """
+    # SDKs run this for every credential refresh, so defer the heavy imports
+    from botocore.session import Session
+    from botocore.exceptions import ClientError
+    from aws_sso_lib.sso import get_credentials
 
-    if verbose or os.environ.get("AWS_SSO_CREDENTIAL_PROCESS_DEBUG", "").lower() in ["1", "true"]:
+    if verbose or env_var_is_true("AWS_SSO_CREDENTIAL_PROCESS_DEBUG"):
         logging.basicConfig(level=logging.DEBUG, filename=LOG_FILE, filemode="w")
     else:
         logging.disable(logging.CRITICAL)
 
-    LOGGER.info("Starting credential process at {}".format(datetime.datetime.now().isoformat()))
+    if LOGGER.isEnabledFor(logging.INFO):
+        LOGGER.info("Starting credential process at {}".format(datetime.datetime.now().isoformat()))
 
-    if role_name is None and os.environ.get("AWS_SSO_ROLE_NAME"):
-        LOGGER.debug("Using role from env: {}".format(os.environ["AWS_SSO_ROLE_NAME"]))
-        role_name = os.environ["AWS_SSO_ROLE_NAME"]
-
-    if account_id is None and os.environ.get("AWS_SSO_ACCOUNT_ID"):
-        LOGGER.debug("Using acccount from env: {}".format(os.environ["AWS_SSO_ACCOUNT_ID"]))
-        account_id = os.environ["AWS_SSO_ACCOUNT_ID"]
+    role_name = get_from_env(role_name, "AWS_SSO_ROLE_NAME", "role")
+    account_id = get_from_env(account_id, "AWS_SSO_ACCOUNT_ID", "account")
 
     # if role_name and role_name.startswith("arn"):
     #     parts = role_name.split(":")
     #     account_id = parts[4]
     #     role_name = parts[5].split("/", 1)[1]
 
-    if start_url is None and os.environ.get("AWS_SSO_START_URL"):
-        start_url = os.environ["AWS_SSO_START_URL"]
-
-    if region is None and os.environ.get("AWS_SSO_REGION"):
-        region = os.environ["AWS_SSO_REGION"]
+    start_url = get_from_env(start_url, "AWS_SSO_START_URL", "start url")
+    region = get_from_env(region, "AWS_SSO_REGION", "SSO region")
 
     session_kwargs = {}
 
@@ -132,20 +139,26 @@ def credential_process(
         "sso_account_id": account_id,
     }
 
-    LOGGER.info("CONFIG FROM ARGS: {}".format(json.dumps(arg_config)))
+    if LOGGER.isEnabledFor(logging.INFO):
+        LOGGER.info("CONFIG FROM ARGS: {}".format(json.dumps(arg_config)))
+
+    # used for the login hint if the failure is before the full config is known
+    config = arg_config
 
     try:
         session = Session(**session_kwargs)
 
         if profile:
             profile_config = session.get_scoped_config()
-            LOGGER.info("CONFIG FROM PROFILE: {}".format(json.dumps(profile_config)))
+            if LOGGER.isEnabledFor(logging.INFO):
+                LOGGER.info("CONFIG FROM PROFILE: {}".format(json.dumps(profile_config)))
         else:
             profile_config = {}
 
         config = get_config(arg_config, profile_config)
 
-        LOGGER.info("CONFIG: {}".format(json.dumps(config)))
+        if LOGGER.isEnabledFor(logging.INFO):
+            LOGGER.info("CONFIG: {}".format(json.dumps(config)))
 
         if (config.get("sso_interactive_auth") or "").lower() == "true":
             raise InvalidSSOConfigError("Interactive auth has been removed. See https://github.com/benkehoe/aws-sso-credential-process/issues/4")
@@ -173,9 +186,10 @@ def credential_process(
             # as provided the expiration isn"t valid ISO8601 and that causes parsing errors for some SDKs
             "Expiration": credentials["expiry_time"].replace("UTC", "Z"),
         }
-        LOGGER.debug("CREDENTIALS: " + json.dumps(output))
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            LOGGER.debug("CREDENTIALS: " + json.dumps(output))
 
-        print(json.dumps(output, separators=(",", ":")))
+        sys.stdout.write(_OUTPUT_ENCODER.encode(output) + "\n")
     except (AuthenticationNeededError, UnauthorizedSSOTokenError) as e:
         if profile:
             aws_sso_util_cmd = f"aws-sso-util login --profile {profile}"
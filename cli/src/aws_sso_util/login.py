@@ -11,9 +11,11 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 
-import os
 import sys
 import logging
+import datetime
+import threading
+from concurrent.futures import Future, wait
 
 import botocore
 from dateutil.parser import parse
@@ -27,7 +29,7 @@ from aws_sso_lib.config import find_instances, find_all_instances, SSOInstance
 from aws_sso_lib.sso import get_token_fetcher
 from aws_sso_lib.exceptions import PendingAuthorizationExpiredError
 
-from .utils import configure_logging
+from .utils import configure_logging, env_var_is_true
 
 LOGGER = logging.getLogger(__name__)
 
@@ -36,9 +38,44 @@ LOGIN_DEFAULT_SSO_REGION_VARS = ["AWS_SSO_LOGIN_DEFAULT_SSO_REGION"]
 
 LOGIN_ALL_VAR = "AWS_SSO_LOGIN_ALL"
 
+MAX_CONCURRENT_LOGINS = 16
+
 UTC_TIME_FORMAT = "%Y-%m-%d %H:%M UTC"
 LOCAL_TIME_FORMAT = "%Y-%m-%d %H:%M %Z"
 
+def parse_expiration(expiration):
+    # the token cache writes %Y-%m-%dT%H:%M:%SZ, which fromisoformat
+    # handles much faster than dateutil once the Z is made an offset
+    if expiration.endswith("Z"):
+        try:
+            return datetime.datetime.fromisoformat(expiration[:-1] + "+00:00")
+        except ValueError:
+            pass
+    return parse(expiration)
+
+def _start_login_thread(fetch_token, instance, login_slots):
+    """Run fetch_token(instance) in a daemon thread, returning a Future for the token.
+
+    A login can be polling for authorization for minutes and can't be interrupted,
+    so it's run in a daemon thread that won't keep the process from exiting on Ctrl-C."""
+    future = Future()
+    def run():
+        with login_slots:
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(fetch_token(instance))
+            except BaseException as e:
+                future.set_exception(e)
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+def _wait_for_token(future):
+    # wait with a timeout, so Ctrl-C is handled promptly on every platform
+    while not wait([future], timeout=1).done:
+        pass
+    return future.result()
+
 @click.command()
 @click.argument("sso_start_url", required=False)
 @click.argument("sso_region", required=False)
@@ -80,7 +117,7 @@ def login(
     force = force or alternate_force
 
     if login_all is None:
-        login_all = os.environ.get(LOGIN_ALL_VAR, "").lower() in ["true", "1"]
+        login_all = env_var_is_true(LOGIN_ALL_VAR)
 
     configure_logging(LOGGER, verbose)
 
@@ -114,58 +151,107 @@ def login(
             LOGGER.fatal(f"Found {len(instances)} Identity Center configs, please specify one or use --all: {SSOInstance.to_strs(instances)}")
             sys.exit(1)
 
-    LOGGER.debug(f"Instances: {SSOInstance.to_strs(instances)}")
+    if LOGGER.isEnabledFor(logging.DEBUG):
+        LOGGER.debug(f"Instances: {SSOInstance.to_strs(instances)}")
+
+    if not instances:
+        # only possible with --all, where finding nothing is not an error
+        return
 
     session = botocore.session.Session(session_vars={
         'profile': (None, None, None, None),
         'region': (None, None, None, None),
     })
 
-    regions = set(i.region for i in instances)
     token_fetchers = {}
-    for region in regions:
-        token_fetchers[region] = get_token_fetcher(session, region, interactive=True, disable_browser=headless)
+    for instance in instances:
+        if instance.region not in token_fetchers:
+            token_fetchers[instance.region] = get_token_fetcher(session, instance.region, interactive=True, disable_browser=headless)
+
+    utc_tz = tzutc()
+    local_tz = tzlocal()
 
     if len(instances) > 1:
         LOGGER.info(f"Logging in {len(instances)} Identity Center instances")
-    for instance in instances:
-        LOGGER.info(f"Logging in {instance.start_url}")
+
+    # valid cached tokens are returned concurrently, but only one browser
+    # authorization is pending at a time, so the user isn't given
+    # multiple codes and browser windows at once
+    interactive_lock = threading.Lock()
+    def fetch_token(instance):
         token_fetcher = token_fetchers[instance.region]
-        try:
-            token = token_fetcher.fetch_token(instance.start_url, force_refresh=force)
-            LOGGER.debug(f"Token: {token}")
-            expiration = token['expiresAt']
-            if isinstance(expiration, str):
-                expiration = parse(expiration)
-            expiration_utc = expiration.astimezone(tzutc())
-            expiration_str = expiration_utc.strftime(UTC_TIME_FORMAT)
+        if not force:
+            token = token_fetcher.get_token_from_cache(instance.start_url)
+            if token and not token_fetcher.is_token_expired(token):
+                return token
+        with interactive_lock:
+            return token_fetcher.fetch_token(instance.start_url, force_refresh=force)
+
+    # with multiple instances, the logins are network-bound, so run them concurrently
+    # and then report on them in order, exiting with the code for the first failure
+    if len(instances) > 1:
+        login_slots = threading.BoundedSemaphore(MAX_CONCURRENT_LOGINS)
+        futures = []
+        for instance in instances:
+            LOGGER.info(f"Logging in {instance.start_url}")
+            futures.append(_start_login_thread(fetch_token, instance, login_slots))
+        token_getters = [lambda future=future: _wait_for_token(future) for future in futures]
+    else:
+        futures = None
+        LOGGER.info(f"Logging in {instances[0].start_url}")
+        token_getters = [lambda: fetch_token(instances[0])]
+
+    exit_code = 0
+    try:
+        for instance, get_token in zip(instances, token_getters):
+            prefix = f"{instance.start_url}: " if len(instances) > 1 else ""
             try:
-                local_expiration = expiration_utc.astimezone(tzlocal())
-                expiration_str = local_expiration.strftime(LOCAL_TIME_FORMAT)
-                # TODO: locale-friendly string
-            except:
-                pass
-            LOGGER.info(f"Login succeeded, valid until {expiration_str}")
-        except PendingAuthorizationExpiredError:
-            LOGGER.error(f"Login window expired")
-            sys.exit(2)
-        except aws_error_utils.catch_aws_error("InvalidGrantException") as e:
-            LOGGER.debug("Login failed; the login window may have expired", exc_info=True)
-            err_info = aws_error_utils.get_aws_error_info(e)
-            msg_str = f" ({err_info.message})" if err_info.message else ""
-            LOGGER.error(f"Login failed; the login window may have expired: {err_info.code}{msg_str}")
-            sys.exit(3)
-        except botocore.exceptions.ClientError as e:
-            LOGGER.debug("Login failed", exc_info=True)
-            err_info = aws_error_utils.get_aws_error_info(e)
-            msg_str = f" ({err_info.message})" if err_info.message else ""
-            LOGGER.error(f"Login failed: {err_info.code}{msg_str}")
-            sys.exit(4)
-        except Exception as e:
-            LOGGER.debug("Login failed", exc_info=True)
-            LOGGER.error(f"Login failed: {e}")
-            sys.exit(4)
+                token = get_token()
+                if LOGGER.isEnabledFor(logging.DEBUG):
+                    LOGGER.debug(f"Token: {token}")
+                expiration = token['expiresAt']
+                if isinstance(expiration, str):
+                    expiration = parse_expiration(expiration)
+                expiration_utc = expiration.astimezone(utc_tz)
+                expiration_str = expiration_utc.strftime(UTC_TIME_FORMAT)
+                try:
+                    local_expiration = expiration_utc.astimezone(local_tz)
+                    expiration_str = local_expiration.strftime(LOCAL_TIME_FORMAT)
+                    # TODO: locale-friendly string
+                except (ValueError, OverflowError, OSError):
+                    pass
+                LOGGER.info(f"{prefix}Login succeeded, valid until {expiration_str}")
+            except PendingAuthorizationExpiredError:
+                LOGGER.error(f"{prefix}Login window expired")
+                exit_code = exit_code or 2
+            except aws_error_utils.catch_aws_error("InvalidGrantException") as e:
+                LOGGER.debug("Login failed; the login window may have expired", exc_info=True)
+                err_info = aws_error_utils.get_aws_error_info(e)
+                msg_str = f" ({err_info.message})" if err_info.message else ""
+                LOGGER.error(f"{prefix}Login failed; the login window may have expired: {err_info.code}{msg_str}")
+                exit_code = exit_code or 3
+            except botocore.exceptions.ClientError as e:
+                LOGGER.debug("Login failed", exc_info=True)
+                err_info = aws_error_utils.get_aws_error_info(e)
+                msg_str = f" ({err_info.message})" if err_info.message else ""
+                LOGGER.error(f"{prefix}Login failed: {err_info.code}{msg_str}")
+                exit_code = exit_code or 4
+            except Exception as e:
+                LOGGER.debug("Login failed", exc_info=True)
+                LOGGER.error(f"{prefix}Login failed: {e}")
+                exit_code = exit_code or 4
+    except KeyboardInterrupt:
+        if not futures:
+            raise
+        # logins that haven't started are cancelled, and the daemon threads
+        # of running ones are abandoned when the process exits
+        for future in futures:
+            future.cancel()
+        click.echo("Aborted!", err=True)
+        sys.exit(1)
 
+    if exit_code:
+        sys.exit(exit_code)
 
 if __name__ == "__main__":
     login(prog_name="python -m aws_sso_util.login")  #pylint: disable=unexpected-keyword-arg,no-value-for-parameter
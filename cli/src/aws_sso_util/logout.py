@@ -14,9 +14,12 @@
 # modified from code at
 # https://github.com/aws/aws-cli/blob/v2/awscli/customizations/sso/logout.py
 
+import abc
 import json
 import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import botocore
 from botocore.exceptions import ClientError
@@ -46,27 +49,46 @@ def logout(verbose):
     SSOCredentialSweeper().delete_credentials(AWS_CREDS_CACHE_DIR)
 
 
-class BaseCredentialSweeper(object):
+class BaseCredentialSweeper(abc.ABC):
+    MAX_WORKERS = 8
+
+    # byte strings that must all appear in a file for it to be worth parsing
+    CONTENT_MARKERS = ()
+
     def delete_credentials(self, creds_dir):
         if not os.path.isdir(creds_dir):
             return
-        filenames = os.listdir(creds_dir)
-        for filename in filenames:
-            filepath = os.path.join(creds_dir, filename)
-            contents = self._get_json_contents(filepath)
-            if contents is None:
-                continue
-            if self._should_delete(contents):
-                self._before_deletion(contents)
-                os.remove(filepath)
-
-    def _should_delete(self, filename):
-        raise NotImplementedError('_should_delete')
+        to_delete = []
+        with os.scandir(creds_dir) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                filepath = entry.path
+                contents = self._get_json_contents(filepath)
+                if contents is None:
+                    continue
+                if self._should_delete(contents):
+                    to_delete.append((filepath, contents))
+        if not to_delete:
+            return
+        # _before_deletion may make API calls, so run them concurrently
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            for _ in executor.map(self._before_deletion, [contents for _, contents in to_delete]):
+                pass
+        for filepath, _ in to_delete:
+            os.remove(filepath)
+
+    @abc.abstractmethod
+    def _should_delete(self, contents):
+        pass
 
     def _get_json_contents(self, filename):
         try:
-            with open(filename, 'r') as f:
-                return json.load(f)
+            with open(filename, 'rb', buffering=0) as f:
+                raw = f.read()
+            if not all(marker in raw for marker in self.CONTENT_MARKERS):
+                return None
+            return json.loads(raw)
         except Exception:
             # We do not want to include the traceback in the exception
             # so that we do not accidentally log sensitive contents because
@@ -79,8 +101,23 @@ class BaseCredentialSweeper(object):
 
 
 class SSOTokenSweeper(BaseCredentialSweeper):
+    CONTENT_MARKERS = (b'"accessToken"',)
+
     def __init__(self, session):
         self._session = session
+        self._clients = {}
+        self._clients_lock = threading.Lock()
+
+    def _get_client(self, sso_region):
+        # botocore sessions aren't safe for concurrent client creation
+        with self._clients_lock:
+            if sso_region not in self._clients:
+                config = botocore.config.Config(
+                    region_name=sso_region,
+                    signature_version=botocore.UNSIGNED,
+                )
+                self._clients[sso_region] = self._session.create_client('sso', config=config)
+            return self._clients[sso_region]
 
     def _should_delete(self, contents):
         return 'accessToken' in contents
@@ -90,11 +127,7 @@ class SSOTokenSweeper(BaseCredentialSweeper):
         # and invoke the logout api to invalidate the token before deleting it.
         sso_region = contents.get('region')
         if sso_region:
-            config = botocore.config.Config(
-                region_name=sso_region,
-                signature_version=botocore.UNSIGNED,
-            )
-            sso = self._session.create_client('sso', config=config)
+            sso = self._get_client(sso_region)
             try:
                 sso.logout(accessToken=contents['accessToken'])
             except ClientError:
@@ -104,6 +137,8 @@ class SSOTokenSweeper(BaseCredentialSweeper):
 
 
 class SSOCredentialSweeper(BaseCredentialSweeper):
+    CONTENT_MARKERS = (b'"ProviderType"', b'"sso"')
+
     def _should_delete(self, contents):
         return contents.get('ProviderType') == 'sso'
 
@@ -14,7 +14,9 @@
 import argparse
 import sys
 import os
+import time
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 import logging
 
 import boto3
@@ -24,6 +26,7 @@ import click
 
 from aws_sso_lib import lookup as _lookup
 from aws_sso_lib import format as _format
+from aws_sso_lib.client_config import get_concurrent_client_config
 
 from .utils import configure_logging, Printer
 
@@ -33,6 +36,50 @@ IDS_CACHE_DIR = os.path.expanduser(
     os.path.join("~", ".aws", "cli", "cache")
 )
 
+MAX_CONCURRENT_LOOKUPS = 16
+
+PERMISSION_SET_ID_PREFIXES = ("arn", "ssoins-", "ins-", "ps-")
+
+PERMISSION_SET_CACHE_KEY_PREFIX = "aws-sso-util-permission-sets-"
+PERMISSION_SET_CACHE_TTL = 24 * 60 * 60
+
+class PermissionSetCache(dict):
+    """Permission set lookup cache that can be saved for later invocations.
+
+    Each entry expires a fixed time after it was looked up.
+    Failed lookups are only cached in memory."""
+    def __init__(self, file_cache, instance_arn, refresh=False):
+        super().__init__()
+        self._file_cache = file_cache
+        self._key = PERMISSION_SET_CACHE_KEY_PREFIX + instance_arn.split("/")[-1]
+        self._expires_at = {}
+        self._modified = False
+        if not refresh and self._key in self._file_cache:
+            now = time.time()
+            for key, entry in self._file_cache[self._key].get("Entries", {}).items():
+                if entry.get("ExpiresAt", 0) > now:
+                    super().__setitem__(key, entry["Value"])
+                    self._expires_at[key] = entry["ExpiresAt"]
+            if self._expires_at:
+                LOGGER.debug(f"Using {len(self._expires_at)} cached permission sets")
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        if not isinstance(value, Exception):
+            self._expires_at[key] = time.time() + PERMISSION_SET_CACHE_TTL
+            self._modified = True
+
+    def save(self):
+        if not self._modified:
+            return
+        self._file_cache[self._key] = {
+            "Entries": {
+                k: {"Value": v, "ExpiresAt": self._expires_at[k]}
+                for k, v in self.items() if not isinstance(v, Exception)
+            },
+        }
+        self._modified = False
+
 @click.command("lookup")
 @click.argument("type", type=click.Choice(["instance", "identity-store", "group", "user", "permission-set"]))
 @click.argument("value", nargs=-1)
@@ -49,6 +96,8 @@ IDS_CACHE_DIR = os.path.expanduser(
 @click.option("--header/--no-header", help="Include or supress the header row")
 
 @click.option("--permission-set-style", type=click.Choice(["arn", "id"]), default="arn", help="Full ARN or only ID")
+@click.option("--no-cache", is_flag=True, help="Do not use or save cached permission sets")
+@click.option("--refresh-cache", is_flag=True, help="Ignore and replace cached permission sets")
 @click.option("--verbose", "-v", count=True)
 def lookup(
         type,
@@ -61,6 +110,8 @@ def lookup(
         separator,
         header,
         permission_set_style,
+        no_cache,
+        refresh_cache,
         verbose):
     """Look up names and ids in Identity Center"""
     configure_logging(LOGGER, verbose)
@@ -103,23 +154,35 @@ def lookup(
         elif type == "permission-set":
             if not value:
                 raise click.UsageError("Permission set name is required")
-            if len(value) == 1 and value[0] == ":all":
-                lookup_all_permission_sets(session, ids, printer, permission_set_style=permission_set_style)
+            if no_cache:
+                permission_set_cache = {}
             else:
-                lookup_permission_sets(session, ids, value, printer,
-                    permission_set_style=permission_set_style,
-                    error_if_not_found=error_if_not_found)
+                permission_set_cache = PermissionSetCache(cache, ids.instance_arn, refresh=refresh_cache)
+            try:
+                if len(value) == 1 and value[0] == ":all":
+                    lookup_all_permission_sets(session, ids, printer,
+                        permission_set_style=permission_set_style,
+                        cache=permission_set_cache)
+                else:
+                    lookup_permission_sets(session, ids, value, printer,
+                        permission_set_style=permission_set_style,
+                        error_if_not_found=error_if_not_found,
+                        cache=permission_set_cache)
+            finally:
+                if not no_cache:
+                    permission_set_cache.save()
 
     except _lookup.LookupError as e:
         print(e, file=sys.stderr)
         sys.exit(1)
 
 def lookup_groups(session, ids, groups, printer: Printer, *, error_if_not_found):
+    identity_store = session.client("identitystore")
     printer.print_header_before()
     for value in groups:
         try:
             group_name = value
-            group_id = _lookup.lookup_group_by_name(session, ids, group_name)["GroupId"]
+            group_id = _lookup.lookup_group_by_name(session, ids, group_name, client=identity_store)["GroupId"]
         except _lookup.LookupError as e:
             if error_if_not_found:
                 printer.print_after()
@@ -130,11 +193,12 @@ def lookup_groups(session, ids, groups, printer: Printer, *, error_if_not_found)
     printer.print_after()
 
 def lookup_users(session, ids, users, printer: Printer, *, error_if_not_found):
+    identity_store = session.client("identitystore")
     printer.print_header_before()
     for value in users:
         try:
             user_name = value
-            user_id = _lookup.lookup_user_by_name(session, ids, user_name)["UserId"]
+            user_id = _lookup.lookup_user_by_name(session, ids, user_name, client=identity_store)["UserId"]
         except _lookup.LookupError as e:
             if error_if_not_found:
                 printer.print_after()
@@ -144,15 +208,18 @@ def lookup_users(session, ids, users, printer: Printer, *, error_if_not_found):
         printer.add_row((user_name, user_id))
     printer.print_after()
 
-def lookup_permission_sets(session, ids, permission_sets, printer: Printer, *, permission_set_style, error_if_not_found):
-    cache = {}
+def lookup_permission_sets(session, ids, permission_sets, printer: Printer, *, permission_set_style, error_if_not_found, cache=None):
+    if cache is None:
+        cache = {}
+    sso = session.client("sso-admin")
     printer.print_header_before()
     for value in permission_sets:
+        is_id = value.startswith(PERMISSION_SET_ID_PREFIXES)
         try:
-            if any(value.startswith(v) for v in ["arn", "ssoins-", "ins-", "ps-"]):
-                permission_set = _lookup.lookup_permission_set_by_id(session, ids, value, cache=cache)
+            if is_id:
+                permission_set = _lookup.lookup_permission_set_by_id(session, ids, value, cache=cache, client=sso)
             else:
-                permission_set = _lookup.lookup_permission_set_by_name(session, ids, value, cache=cache)
+                permission_set = _lookup.lookup_permission_set_by_name(session, ids, value, cache=cache, client=sso)
             permission_set_name = permission_set["Name"]
             permission_set_arn = permission_set["PermissionSetArn"]
         except _lookup.LookupError as e:
@@ -160,7 +227,7 @@ def lookup_permission_sets(session, ids, permission_sets, printer: Printer, *, p
                 printer.print_after()
                 print("Permission set {} not found".format(value), file=sys.stderr)
                 sys.exit(1)
-            if any(value.startswith(v) for v in ["arn", "ssoins-", "ins-", "ps-"]):
+            if is_id:
                 permission_set_arn = _format.format_permission_set_arn(ids, value)
                 permission_set_name = "UNKNOWN"
             else:
@@ -171,15 +238,22 @@ def lookup_permission_sets(session, ids, permission_sets, printer: Printer, *, p
         printer.add_row((permission_set_name, permission_set_arn))
     printer.print_after()
 
-def lookup_all_permission_sets(session, ids, printer: Printer, *, permission_set_style):
-    cache = {}
+def lookup_all_permission_sets(session, ids, printer: Printer, *, permission_set_style, cache=None):
+    if cache is None:
+        cache = {}
     printer.print_header_before()
-    sso = session.client("sso-admin")
+    sso = session.client("sso-admin", config=get_concurrent_client_config(MAX_CONCURRENT_LOOKUPS))
+    permission_set_arns = []
     paginator = sso.get_paginator("list_permission_sets")
     for ind, response in enumerate(paginator.paginate(InstanceArn=ids.instance_arn)):
         LOGGER.debug(f"ListPermissionSets page {ind+1}: {', '.join(response['PermissionSets'])}")
-        for permission_set_arn in response["PermissionSets"]:
-            permission_set = _lookup.lookup_permission_set_by_id(session, ids, permission_set_arn, cache=cache)
+        permission_set_arns.extend(response["PermissionSets"])
+
+    # each lookup is a DescribePermissionSet call, so run them concurrently
+    def lookup_permission_set(permission_set_arn):
+        return _lookup.lookup_permission_set_by_id(session, ids, permission_set_arn, cache=cache, client=sso)
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_LOOKUPS) as executor:
+        for permission_set in executor.map(lookup_permission_set, permission_set_arns):
             permission_set_name = permission_set["Name"]
             permission_set_arn = permission_set["PermissionSetArn"]
             if permission_set_style == "id":
@@ -20,19 +20,22 @@ import subprocess
 import re
 import shlex
 from collections import namedtuple
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 
 import botocore
-from botocore.exceptions import ClientError, ProfileNotFound
+from botocore.exceptions import ClientError
 from botocore.compat import compat_shell_split as shell_split
 
 import click
 
 from aws_sso_lib.sso import get_token_fetcher
 from aws_sso_lib.config import find_instances, SSOInstance
-from aws_sso_lib.config_file_writer import ConfigFileWriter, write_values, get_config_filename, process_profile_name
+from aws_sso_lib.config_file_writer import ConfigFileWriter, write_profiles, get_config_filename, process_profile_name
 from aws_sso_lib.compat import shell_quote, shell_join
+from aws_sso_lib.client_config import get_concurrent_client_config
 
-from .utils import configure_logging, get_instance, GetInstanceError
+from .utils import configure_logging, get_instance, GetInstanceError, env_var_is_true, parse_config_defaults
 
 from .configure_profile import (
     CONFIGURE_DEFAULT_START_URL_VARS,
@@ -40,33 +43,38 @@ from .configure_profile import (
     CONFIGURE_DEFAULT_REGION_VARS,
     DISABLE_CREDENTIAL_PROCESS_VAR,
     CREDENTIAL_PROCESS_NAME_VAR,
-    SET_CREDENTIAL_PROCESS_DEFAULT
+    SET_CREDENTIAL_PROCESS_DEFAULT,
+    get_existing_profile_config,
 )
 
 DEFAULT_SEPARATOR = "."
 
+MAX_CONCURRENT_ROLE_REQUESTS = 16
+
 LOGGER = logging.getLogger(__name__)
 
 ConfigParams = namedtuple("ConfigParams", ["profile_name", "account_name", "account_id", "role_name", "region"])
 
+REGION_AREA_ABBREVIATIONS = {
+    "us-gov": "gov"
+}
+REGION_DIRECTION_ABBREVIATIONS = {
+    "north": "no",
+    "northeast": "ne",
+    "east": "ea",
+    "southeast": "se",
+    "south": "so",
+    "southwest": "sw",
+    "west": "we",
+    "northwest": "nw",
+    "central": "ce",
+}
+
+@lru_cache(maxsize=64)
 def get_short_region(region):
     try:
         area, direction, num = region.rsplit("-", 2)
-        area_abbr = {
-            "us-gov": "gov"
-        }
-        dir_abbr = {
-            "north": "no",
-            "northeast": "ne",
-            "east": "ea",
-            "southeast": "se",
-            "south": "so",
-            "southwest": "sw",
-            "west": "we",
-            "northwest": "nw",
-            "central": "ce",
-        }
-        return "".join([area_abbr.get(area, area), dir_abbr.get(direction, direction), num])
+        return "".join([REGION_AREA_ABBREVIATIONS.get(area, area), REGION_DIRECTION_ABBREVIATIONS.get(direction, direction), num])
     except Exception as e:
         LOGGER.debug(f"Error creating short region: {e}", exc_info=True)
         return region
@@ -96,7 +104,8 @@ def generate_profile_name_format(input, separator, region_style):
 
 def get_formatter(include_region, region_format, no_region_format):
     def proc_kwargs(kwargs):
-        kwargs["short_region"] = get_short_region(kwargs["region"])
+        if "short_region" not in kwargs:
+            kwargs["short_region"] = get_short_region(kwargs["region"])
         kwargs["account_number"] = kwargs["account_id"]
         return kwargs
     if include_region == "default":
@@ -128,7 +137,8 @@ def get_process_formatter(command):
     def formatter(i, n, **kwargs):
         kwargs["region_index"] = str(i)
         kwargs["num_regions"] = str(n)
-        kwargs["short_region"] = get_short_region(kwargs["region"])
+        if "short_region" not in kwargs:
+            kwargs["short_region"] = get_short_region(kwargs["region"])
         run_args = shell_split(command)
         for component in PROCESS_FORMATTER_ARGS:
             run_args.append(kwargs[component])
@@ -147,12 +157,43 @@ def get_process_formatter(command):
         return result.stdout.decode("utf-8").strip()
     return formatter
 
+def get_batch_process_formatter(command):
+    def batch_formatter(name_args):
+        if not name_args:
+            return []
+        lines = []
+        for i, n, kwargs in name_args:
+            kwargs = dict(kwargs, region_index=str(i), num_regions=str(n))
+            if "short_region" not in kwargs:
+                kwargs["short_region"] = get_short_region(kwargs["region"])
+            lines.append("\t".join(kwargs[component] for component in PROCESS_FORMATTER_ARGS) + "\n")
+        try:
+            result = subprocess.run(shell_join(shell_split(command)), shell=True, input="".join(lines).encode("utf-8"), stdout=subprocess.PIPE, check=True)
+        except subprocess.CalledProcessError as e:
+            lines = [
+                "Profile name process failed ({})".format(e.returncode)
+            ]
+            if e.stdout:
+                lines.append(e.stdout.decode("utf-8"))
+            if e.stderr:
+                lines.append(e.stderr.decode("utf-8"))
+            raise click.ClickException("\n".join(lines))
+        profile_names = [line.strip() for line in result.stdout.decode("utf-8").splitlines()]
+        if len(profile_names) != len(name_args):
+            raise click.ClickException(
+                "Profile name process output {} lines for {} profiles; ".format(len(profile_names), len(name_args)) +
+                "with --profile-name-process-batch it must output one name per input line, in order")
+        return profile_names
+    return batch_formatter
+
 def get_trim_formatter(account_name_patterns, role_name_patterns, formatter):
+    account_name_regexes = [re.compile(pattern) for pattern in account_name_patterns]
+    role_name_regexes = [re.compile(pattern) for pattern in role_name_patterns]
     def trim_formatter(i, n, **kwargs):
-        for pattern in account_name_patterns:
-            kwargs["account_name"] = re.sub(pattern, "", kwargs["account_name"])
-        for pattern in role_name_patterns:
-            kwargs["role_name"] = re.sub(pattern, "", kwargs["role_name"])
+        for regex in account_name_regexes:
+            kwargs["account_name"] = regex.sub("", kwargs["account_name"])
+        for regex in role_name_regexes:
+            kwargs["role_name"] = regex.sub("", kwargs["role_name"])
         return formatter(i, n, **kwargs)
     return trim_formatter
 
@@ -180,8 +221,10 @@ def get_name_case_formatter(account_name_transform, role_name_transform, formatt
         return formatter(i, n, **kwargs)
     return case_formatter
 
+UNSAFE_ACCOUNT_NAME_CHARS_RE = re.compile(r"[\s\[\]]+")
+
 def get_safe_account_name(name):
-    return re.sub(r"[\s\[\]]+", "-", name).strip("-")
+    return UNSAFE_ACCOUNT_NAME_CHARS_RE.sub("-", name).strip("-")
 
 @click.command("populate")
 @click.option("--sso-start-url", "-u", metavar="URL", help="Your Identity Center start URL")
@@ -203,10 +246,14 @@ def get_safe_account_name(name):
 @click.option("--account-name-case", "profile_name_account_name_case_transform", type=click.Choice(["capitalize", "casefold", "lower", "title", "upper"]), help="Method to change the case of the account name")
 @click.option("--role-name-case", "profile_name_role_name_case_transform", type=click.Choice(["capitalize", "casefold", "lower", "title", "upper"]), help="Method to change the case of the role name")
 @click.option("--profile-name-process", metavar="COMMAND")
+@click.option("--skip-account-id", "skip_account_id_patterns", metavar="REGEX", multiple=True, default=[], help="Do not create profiles for account ids matching a regex, can provide multiple times")
+@click.option("--skip-role-name", "skip_role_name_patterns", metavar="REGEX", multiple=True, default=[], help="Do not create profiles for role names matching a regex, can provide multiple times")
+@click.option("--profile-name-process-batch", is_flag=True, help="Run the profile name process once, with the arguments for each profile as a tab-separated line on stdin")
 @click.option("--safe-account-names/--raw-account-names", default=True, help="In profiles, replace any character sequences in account names not in A-Za-z0-9-._ with a single -")
 
 @click.option("--credential-process/--no-credential-process", default=None, help="Force enable/disable setting the credential process SDK helper")
 
+@click.option("--force-write", is_flag=True, help="Write profiles even if their config is unchanged")
 @click.option("--force-refresh", is_flag=True, help="Re-login")
 @click.option("--verbose", "-v", count=True)
 def populate_profiles(
@@ -225,8 +272,12 @@ def populate_profiles(
         profile_name_account_name_case_transform,
         profile_name_role_name_case_transform,
         profile_name_process,
+        profile_name_process_batch,
+        skip_account_id_patterns,
+        skip_role_name_patterns,
         safe_account_names,
         credential_process,
+        force_write,
         force_refresh,
         verbose):
     """Configure profiles for all accounts and roles.
@@ -262,15 +313,24 @@ def populate_profiles(
     if missing:
         raise click.UsageError("Missing arguments: {}".format(", ".join(missing)))
 
-    if config_default:
-        config_default = dict(v.split("=", 1) for v in config_default)
-    else:
-        config_default = {}
+    if profile_name_process_batch and not profile_name_process:
+        raise click.UsageError("--profile-name-process-batch requires --profile-name-process")
+
+    try:
+        skip_account_id_regexes = [re.compile(pattern) for pattern in skip_account_id_patterns]
+        skip_role_name_regexes = [re.compile(pattern) for pattern in skip_role_name_patterns]
+    except re.error as e:
+        raise click.UsageError("Invalid skip pattern: {}".format(e))
+
+    config_default = parse_config_defaults(config_default)
 
     if not profile_name_separator:
         profile_name_separator = os.environ.get("AWS_CONFIGURE_SSO_DEFAULT_PROFILE_NAME_SEPARATOR") or DEFAULT_SEPARATOR
 
-    if profile_name_process:
+    profile_names_formatter = None
+    if profile_name_process_batch:
+        profile_names_formatter = get_batch_process_formatter(profile_name_process)
+    elif profile_name_process:
         profile_name_formatter = get_process_formatter(profile_name_process)
     else:
         region_format, no_region_format = generate_profile_name_format(profile_name_components, profile_name_separator, profile_name_region_style)
@@ -278,12 +338,19 @@ def populate_profiles(
         LOGGER.debug("Profile name format (no region): {}".format(no_region_format))
         profile_name_formatter = get_formatter(profile_name_include_region, region_format, no_region_format)
         if profile_name_trim_account_name_patterns or profile_name_trim_role_name_patterns:
-            profile_name_formatter = get_trim_formatter(profile_name_trim_account_name_patterns, profile_name_trim_role_name_patterns, profile_name_formatter)
+            try:
+                profile_name_formatter = get_trim_formatter(profile_name_trim_account_name_patterns, profile_name_trim_role_name_patterns, profile_name_formatter)
+            except re.error as e:
+                raise click.UsageError("Invalid profile name format: {}".format(e))
         if profile_name_account_name_case_transform or profile_name_role_name_case_transform:
             profile_name_formatter = get_name_case_formatter(profile_name_account_name_case_transform, profile_name_role_name_case_transform, profile_name_formatter)
 
+    if not profile_names_formatter:
+        def profile_names_formatter(name_args):
+            return [profile_name_formatter(i, n, **kwargs) for i, n, kwargs in name_args]
+
     try:
-        profile_name_formatter(0, 1, account_name="foo", account_id="bar", role_name="baz", region="us-east-1")
+        profile_names_formatter([(0, 1, dict(account_name="foo", account_id="bar", role_name="baz", region="us-east-1"))])
     except Exception as e:
         raise click.UsageError("Invalid profile name format: {}".format(e))
 
@@ -302,80 +369,104 @@ def populate_profiles(
 
     LOGGER.debug("Token: {}".format(token))
 
-    config = botocore.config.Config(
+    config = get_concurrent_client_config(
+        MAX_CONCURRENT_ROLE_REQUESTS,
         region_name=instance.region,
         signature_version=botocore.UNSIGNED,
     )
     client = session.create_client("sso", config=config)
 
     LOGGER.info("Gathering accounts and roles")
-    accounts = []
-    list_accounts_args = {
-        "accessToken": token["accessToken"]
-    }
-    while True:
-        response = client.list_accounts(**list_accounts_args)
 
-        accounts.extend(response["accountList"])
-
-        next_token = response.get("nextToken")
-        if not next_token:
-            break
-        else:
-            list_accounts_args["nextToken"] = response["nextToken"]
+    def iter_accounts():
+        list_accounts_args = {
+            "accessToken": token["accessToken"]
+        }
+        while True:
+            response = client.list_accounts(**list_accounts_args)
 
-    LOGGER.debug("Account list: {} {}".format(len(accounts), accounts))
+            yield from response["accountList"]
 
-    configs = []
-    for account in accounts:
-        if not account.get("accountName"):
-            account["accountName"] = account["accountId"]
+            next_token = response.get("nextToken")
+            if not next_token:
+                break
+            else:
+                list_accounts_args["nextToken"] = response["nextToken"]
 
+    def get_roles(account):
         LOGGER.debug("Getting roles for {}".format(account["accountId"]))
+        roles = []
         list_role_args = {
             "accessToken": token["accessToken"],
             "accountId": account["accountId"],
         }
-
-        num_regions = len(regions)
         while True:
             response = client.list_account_roles(**list_role_args)
 
-            for role in response["roleList"]:
-                for i, region in enumerate(regions):
-                    if safe_account_names:
-                        account_name_for_profile = get_safe_account_name(account["accountName"])
-                    else:
-                        account_name_for_profile = account["accountName"]
-
-                    profile_name = profile_name_formatter(i, num_regions,
-                        account_name=account_name_for_profile,
-                        account_id=account["accountId"],
-                        role_name=role["roleName"],
-                        region=region,
-                    )
-                    if profile_name == "SKIP":
-                        continue
-                    configs.append(ConfigParams(profile_name, account["accountName"], account["accountId"], role["roleName"], region))
+            roles.extend(response["roleList"])
 
             next_token = response.get("nextToken")
             if not next_token:
                 break
             else:
                 list_role_args["nextToken"] = response["nextToken"]
+        return roles
+
+    num_regions = len(regions)
+    short_regions = {region: get_short_region(region) for region in regions}
+    name_args = []
+    config_args = []
+    # the role listing is one or more API calls per account, so run them concurrently,
+    # starting on each page of accounts while the next page is fetched
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_ROLE_REQUESTS) as executor:
+        account_futures = []
+        for account in iter_accounts():
+            # skipped accounts cost no role listing calls
+            if any(regex.search(account["accountId"]) for regex in skip_account_id_regexes):
+                continue
+            if not account.get("accountName"):
+                account["accountName"] = account["accountId"]
+            account_futures.append((account, executor.submit(get_roles, account)))
+
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            accounts = [account for account, _ in account_futures]
+            LOGGER.debug("Account list: {} {}".format(len(accounts), accounts))
+
+        for account, future in account_futures:
+            roles = future.result()
+            if safe_account_names:
+                account_name_for_profile = get_safe_account_name(account["accountName"])
+            else:
+                account_name_for_profile = account["accountName"]
+
+            for role in roles:
+                if any(regex.search(role["roleName"]) for regex in skip_role_name_regexes):
+                    continue
+                for i, region in enumerate(regions):
+                    name_args.append((i, num_regions, dict(
+                        account_name=account_name_for_profile,
+                        account_id=account["accountId"],
+                        role_name=role["roleName"],
+                        region=region,
+                        short_region=short_regions[region],
+                    )))
+                    config_args.append((account["accountName"], account["accountId"], role["roleName"], region))
 
+    configs = []
+    for profile_name, args in zip(profile_names_formatter(name_args), config_args):
+        if profile_name == "SKIP":
+            continue
+        configs.append(ConfigParams(profile_name, *args))
 
     configs.sort(key=lambda v: v.profile_name)
 
     LOGGER.debug("Got configs: {}".format(configs))
 
     if not dry_run:
-        LOGGER.info("Writing {} profiles to {}".format(len(configs), get_config_filename(session)))
-
-        config_writer = ConfigFileWriter()
+        # written all at once after the loop, so the config file is only rewritten once
+        profile_values = []
         def write_config(profile_name, config_values):
-            # discard because we're already loading the existing values
-            write_values(session, profile_name, config_values, existing_config_action="discard", config_file_writer=config_writer)
+            profile_values.append((profile_name, config_values))
     else:
         LOGGER.info("Dry run for {} profiles".format(len(configs)))
         def write_config(profile_name, config_values):
@@ -394,12 +485,12 @@ def populate_profiles(
         existing_profile = False
         existing_config = {}
         if existing_config_action != "discard":
-            try:
-                existing_config = botocore.session.Session(profile=config.profile_name).get_scoped_config()
+            # the shared session parses the config file once for all profiles
+            profile_config = get_existing_profile_config(session, config.profile_name)
+            if profile_config is not None:
+                existing_config = profile_config
                 config_values.update(existing_config)
                 existing_profile = True
-            except ProfileNotFound:
-                pass
 
         config_values.update({
             "sso_start_url": instance.start_url,
@@ -420,7 +511,7 @@ def populate_profiles(
 
         if credential_process is not None:
             set_credential_process = credential_process
-        elif os.environ.get(DISABLE_CREDENTIAL_PROCESS_VAR, "").lower() in ["1", "true"]:
+        elif env_var_is_true(DISABLE_CREDENTIAL_PROCESS_VAR):
             set_credential_process = False
         else:
             set_credential_process = SET_CREDENTIAL_PROCESS_DEFAULT
@@ -435,8 +526,19 @@ def populate_profiles(
 
         LOGGER.debug("Config values for profile {}: {}".format(config.profile_name, config_values))
 
+        if not dry_run and not force_write and get_existing_profile_config(session, config.profile_name) == config_values:
+            LOGGER.debug("Profile {} is unchanged".format(config.profile_name))
+            continue
+
         write_config(config.profile_name, config_values)
 
+    if not dry_run:
+        num_unchanged = len(configs) - len(profile_values)
+        LOGGER.info("Writing {} profiles to {} ({} unchanged)".format(len(profile_values), get_config_filename(session), num_unchanged))
+        if profile_values:
+            # discard because we're already loading the existing values
+            write_profiles(session, profile_values, existing_config_action="discard", config_file_writer=ConfigFileWriter())
+
 
 if __name__ == "__main__":
     populate_profiles(prog_name="python -m aws_sso_util.populate_profiles")  #pylint: disable=unexpected-keyword-arg,no-value-for-parameter
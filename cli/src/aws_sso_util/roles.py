@@ -14,22 +14,24 @@
 import logging
 import re
 import sys
-from collections import namedtuple
+from operator import itemgetter
 
 import click
 
-from aws_sso_lib.sso import list_available_roles, login
-
 from .utils import configure_logging, get_instance, GetInstanceError, Printer
 
 LOGGER = logging.getLogger(__name__)
 
+MAX_CONCURRENT_ROLE_REQUESTS = 16
+
 HEADER_FIELDS = {
     "id": "Account ID",
     "name": "Account name",
     "role": "Role name"
 }
 
+ROW_FIELD_KEYS = ("id", "name", "role")
+
 @click.command()
 @click.option("--sso-start-url", "-u", metavar="URL", help="Your Identity Center start URL")
 @click.option("--sso-region", metavar="REGION", help="The AWS region your Identity Center instance is deployed in")
@@ -59,20 +61,28 @@ def roles(
     You can filter the list by providing account IDs and role name patterns.
 
     """
+    # imports boto3, which is only needed once the command runs
+    from aws_sso_lib.sso import list_available_roles, login
 
     configure_logging(LOGGER, verbose)
 
     if not account_values:
         account_ids = None
         account_filter = lambda id, name: True
-    elif all(re.match(r"^\d{12}$", a) for a in account_values):
+    elif all(len(a) == 12 and a.isdigit() for a in account_values):
         account_ids = account_values
         account_filter = lambda id, name: True
     else:
         account_ids = None
+        # digit-only values (usually partial account ids) have no regex syntax,
+        # so a substring check matches the same account names as the regex would
+        account_value_matchers = [
+            (value, (lambda name, value=value: value in name) if value.isdigit() else re.compile(value).search)
+            for value in account_values
+        ]
         def account_filter(id, name):
-            for value in account_values:
-                if id.startswith(value) or id.endswith(value) or re.search(value, name):
+            for value, name_matches in account_value_matchers:
+                if id.startswith(value) or id.endswith(value) or name_matches(name):
                     return True
             return False
 
@@ -94,10 +104,11 @@ def roles(
     else:
         header_field_keys = ("role", "name", "id")
     header_fields = [HEADER_FIELDS[k] for k in header_field_keys]
-    Row = namedtuple("Row", header_field_keys)
+    # rows are plain tuples in header order, built from (id, name, role)
+    row_order = itemgetter(*(ROW_FIELD_KEYS.index(k) for k in header_field_keys))
 
     if sort_by_keys:
-        sort_key = lambda v: tuple(getattr(v, key) for key in sort_by_keys)
+        sort_key = itemgetter(*(header_field_keys.index(k) for k in sort_by_keys))
     else:
         sort_key = None
 
@@ -122,16 +133,18 @@ def roles(
     )
     printer.print_header_before()
 
-    for account_id, account_name, role_name in list_available_roles(instance.start_url, instance.region, account_id=account_ids):
+    role_name_regexes = [re.compile(pattern) for pattern in role_name_patterns]
+
+    for account_id, account_name, role_name in list_available_roles(
+            instance.start_url,
+            instance.region,
+            account_id=account_ids,
+            max_workers=MAX_CONCURRENT_ROLE_REQUESTS):
         if not account_filter(account_id, account_name):
             continue
-        if role_name_patterns:
-            for pattern in role_name_patterns:
-                if re.search(pattern, role_name):
-                    break
-            else:
-                continue
-        printer.add_row(Row(id=account_id, name=account_name, role=role_name))
+        if role_name_regexes and not any(regex.search(role_name) for regex in role_name_regexes):
+            continue
+        printer.add_row(row_order((account_id, account_name, role_name)))
 
     printer.print_after()
 
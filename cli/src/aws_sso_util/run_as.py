@@ -20,8 +20,6 @@ import subprocess
 
 import click
 
-from aws_sso_lib.sso import get_boto3_session, login
-
 from .utils import configure_logging, get_instance, GetInstanceError
 
 LOGGER = logging.getLogger(__name__)
@@ -48,6 +46,8 @@ def run_as(
         exec_args):
     """Run a command as a specific account + role.
     """
+    # imports boto3, which is only needed once the command runs
+    from aws_sso_lib.sso import get_boto3_session, login
 
     configure_logging(LOGGER, verbose)
 
@@ -62,6 +62,7 @@ def run_as(
 
     login(instance.start_url, instance.region, force_refresh=force_refresh)
 
+    # these must be cleared before the session is created, as it reads them
     for key in ['AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'AWS_SESSION_TOKEN', 'AWS_PROFILE', 'AWS_DEFAULT_PROFILE']:
         os.environ.pop(key, None)
 
@@ -95,15 +96,27 @@ def run_as(
     if session_token:
         env_vars['AWS_SESSION_TOKEN'] = session_token
     if expiration:
-        env_vars['AWS_CREDENTIALS_EXPIRATION'] = expiration.strftime('%Y-%m-%dT%H:%M:%SZ')
+        env_vars['AWS_CREDENTIALS_EXPIRATION'] = expiration.replace(tzinfo=None).isoformat(timespec='seconds') + 'Z'
 
     if session.region_name:
         env_vars['AWS_DEFAULT_REGION'] = session.region_name
 
-    os.environ.update(env_vars)
+    child_env = dict(os.environ)
+    child_env.update(env_vars)
+
+    if os.name == "posix":
+        # replace this process with the command, so it gets signals directly and no shell is needed
+        sys.stdout.flush()
+        sys.stderr.flush()
+        try:
+            os.execvpe(exec_args[0], exec_args, child_env)
+        except OSError as e:
+            LOGGER.fatal(f"Could not run {exec_args[0]}: {e}")
+            sys.exit(127)
 
+    # on Windows, the shell is needed to find .cmd/.bat commands and builtins
     command = ' '.join(shlex.quote(arg) for arg in exec_args)
-    result = subprocess.run(command, shell=True)
+    result = subprocess.run(command, shell=True, env=child_env)
     sys.exit(result.returncode)
 
 if __name__ == "__main__":
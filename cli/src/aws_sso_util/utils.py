@@ -11,12 +11,33 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 
+import os
 import logging
 import logging.handlers
 import sys
 
+import click
+
 from aws_sso_lib.config import find_instances, SSOInstance
 
+TRUTHY_ENV_VALUES = frozenset(["true", "1"])
+
+_AWS_SSO_UTIL_LOGGER = logging.getLogger("aws_sso_util")
+_AWS_SSO_LIB_LOGGER = logging.getLogger("aws_sso_lib")
+
+def env_var_is_true(var_name):
+    return os.environ.get(var_name, "").lower() in TRUTHY_ENV_VALUES
+
+def parse_config_defaults(config_default):
+    """Parse --config-default KEY=VALUE options into a dict."""
+    config_default_values = {}
+    for value in config_default or []:
+        key, sep, default_value = value.partition("=")
+        if not sep:
+            raise click.BadParameter(f"{value!r} is not in the form KEY=VALUE", param_hint="--config-default")
+        config_default_values[key] = default_value
+    return config_default_values
+
 class StdoutFilter(logging.Filter):
     def filter(self, rec):
         return rec.levelno < logging.WARNING
@@ -29,8 +50,8 @@ def configure_logging(logger, verbose, **config_args):
 
     logging.basicConfig(**config_args)
 
-    aws_sso_util_logger = logging.getLogger("aws_sso_util")
-    aws_sso_lib_logger = logging.getLogger("aws_sso_lib")
+    aws_sso_util_logger = _AWS_SSO_UTIL_LOGGER
+    aws_sso_lib_logger = _AWS_SSO_LIB_LOGGER
     root_logger = logging.getLogger()
 
     if verbose == 0:
@@ -122,6 +143,8 @@ class Printer:
         self.rows = [] if not self.print_along else None
 
         self.printer = printer or print
+        # with the default printer, sorted/justified output is written in one go
+        self._buffer_output = printer is None
 
     def print_header_before(self):
         if self.print_along and not self.disable_header:
@@ -133,14 +156,6 @@ class Printer:
         else:
             self.rows.append(row)
 
-    def _process_row_skip(self, row, prev_row):
-        if self.skip_repeated_values is True:
-            proc = lambda v, pv: "" if v == pv else v
-            return [proc(v, pv) for v, pv in zip(row, prev_row)]
-        else:
-            proc = lambda s, v, pv: "" if s and v == pv else v
-            return [proc(s, v, pv) for s, v, pv in zip(self.skip_repeated_values, row, prev_row)]
-
     def print_after(self):
         if self.print_along:
             return
@@ -152,8 +167,8 @@ class Printer:
         else:
             col_widths = [len(h) for h in self.header_fields]
 
-        for row in self.rows:
-            col_widths = [max(cw, len(v)) for cw, v in zip(col_widths, row)]
+        if self.rows:
+            col_widths = [max(cw, max(map(len, col))) for cw, col in zip(col_widths, zip(*self.rows))]
 
         def just(row):
             if not self._justify:
@@ -161,18 +176,40 @@ class Printer:
             else:
                 return [v.ljust(cw) for cw, v in zip(col_widths, row)]
 
+        if self._buffer_output:
+            lines = []
+            emit = lines.append
+        else:
+            emit = self.printer
+
         if not self.disable_header:
-            self.printer(self._header_sep.join(just(self.header_fields)))
+            emit(self._header_sep.join(just(self.header_fields)))
+
+        # build the row layout once; the separator is escaped as it's user input
+        sep = self._sep.replace("%", "%%")
+        if self._justify:
+            row_format = sep.join("%%-%ds" % cw for cw in col_widths)
+        else:
+            row_format = sep.join(["%s"] * len(col_widths))
+
+        # which columns blank out values repeated from the previous row
+        if self.skip_repeated_values is True:
+            skip_mask = (True,) * len(col_widths)
+        elif self.skip_repeated_values:
+            skip_mask = tuple(bool(s) for s in self.skip_repeated_values)
+        else:
+            skip_mask = None
 
-        first_loop = True
         prev_row = None
         for row in self.rows:
-            if not first_loop and self.skip_repeated_values:
-                row_to_print = self._process_row_skip(row, prev_row)
+            if skip_mask and prev_row is not None:
+                row_to_print = tuple("" if skip and v == pv else v for skip, v, pv in zip(skip_mask, row, prev_row))
             else:
-                row_to_print = row
+                row_to_print = tuple(row)
 
-            self.printer(self._sep.join(just(row_to_print)))
+            emit(row_format % row_to_print)
 
             prev_row = row
-            first_loop = False
+
+        if self._buffer_output and lines:
+            sys.stdout.write("\n".join(lines) + "\n")
@@ -11,7 +11,33 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 
-__version__ = '1.14.0' # change in pyproject.toml too
+__version__ = '1.15.0' # change in pyproject.toml too
 
-from .sso import get_boto3_session, login, list_available_accounts, list_available_roles
-from .assignments import Assignment, list_assignments
+import importlib
+import typing
+
+if typing.TYPE_CHECKING:
+    from .sso import get_boto3_session, login, list_available_accounts, list_available_roles
+    from .assignments import Assignment, list_assignments
+
+# these pull in boto3, so they're only imported when first accessed
+# attribute name -> submodule
+_LAZY_ATTRS = {
+    "get_boto3_session": "sso",
+    "login": "sso",
+    "list_available_accounts": "sso",
+    "list_available_roles": "sso",
+    "Assignment": "assignments",
+    "list_assignments": "assignments",
+}
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f".{_LAZY_ATTRS[name]}", __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
@@ -17,14 +17,26 @@ import collections
 import logging
 from collections.abc import Iterable
 import itertools
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 
+from botocore.exceptions import ClientError
 import aws_error_utils
 
 from .lookup import Ids, lookup_accounts_for_ou
 from .format import format_account_id
+from .client_config import get_concurrent_client_config
 
 LOGGER = logging.getLogger(__name__)
 
+# above this many account targets, their names are found by listing all accounts once
+# (a single ListAccounts page) rather than with a DescribeAccount call for each
+_ACCOUNT_NAME_LIST_THRESHOLD = 20
+
+_ACCOUNT_ID_PATTERN = re.compile(r"^\d+$")
+_ROOT_ID_PATTERN = re.compile(r"^r-[a-z0-9]{4,32}$")
+_OU_ID_PATTERN = re.compile(r"^ou-[a-z0-9]{4,32}-[a-z0-9]{8,32}$")
+
 _Context = collections.namedtuple("_Context", [
     "session",
     "ids",
@@ -38,7 +50,10 @@ _Context = collections.namedtuple("_Context", [
     "get_permission_set_names",
     "get_target_names",
     "ou_recursive",
-    "cache",
+    "max_workers",
+    "lookup_account_name",
+    "lookup_permission_set_name",
+    "lookup_principal_name",
     "filter_cache"
 ])
 
@@ -49,6 +64,71 @@ def _filter(filter_cache, key, func, args):
         filter_cache[key] = func(*args)
     return filter_cache[key]
 
+def _get_account_name_lookup(session, account_count):
+    organizations_client = session.client("organizations")
+
+    if account_count <= _ACCOUNT_NAME_LIST_THRESHOLD:
+        @lru_cache(maxsize=None)
+        def lookup_account_name(account_id):
+            account = organizations_client.describe_account(AccountId=account_id)["Account"]
+            return account.get("Name") or None
+        return lookup_account_name
+
+    account_names = None
+    def lookup_account_name(account_id):
+        nonlocal account_names
+        if account_names is None:
+            account_names = {}
+            accounts_paginator = organizations_client.get_paginator("list_accounts")
+            for response in accounts_paginator.paginate():
+                LOGGER.debug(f"ListAccounts page: {response}")
+                for account in response["Accounts"]:
+                    account_names[account["Id"]] = account.get("Name") or None
+        return account_names.get(account_id)
+    return lookup_account_name
+
+def _get_permission_set_name_lookup(session, ids, config=None):
+    sso_admin_client = session.client("sso-admin", config=config)
+
+    @lru_cache(maxsize=None)
+    def lookup_permission_set_name(permission_set_arn):
+        response = sso_admin_client.describe_permission_set(
+            InstanceArn=ids.instance_arn,
+            PermissionSetArn=permission_set_arn
+        )
+        LOGGER.debug(f"DescribePermissionSet response: {response}")
+        return response["PermissionSet"]["Name"]
+    return lookup_permission_set_name
+
+def _get_principal_name_lookup(session, ids):
+    identity_store_client = session.client("identitystore")
+
+    @lru_cache(maxsize=None)
+    def lookup_principal_name(principal_type, principal_id):
+        if principal_type == "GROUP":
+            try:
+                response = identity_store_client.describe_group(
+                    IdentityStoreId=ids.identity_store_id,
+                    GroupId=principal_id
+                )
+                LOGGER.debug(f"DescribeGroup response: {response}")
+                return response["DisplayName"]
+            except aws_error_utils.catch_aws_error("ResourceNotFoundException"):
+                return None
+        elif principal_type == "USER":
+            try:
+                response = identity_store_client.describe_user(
+                    IdentityStoreId=ids.identity_store_id,
+                    UserId=principal_id
+                )
+                LOGGER.debug(f"DescribeUser response: {response}")
+                return response["UserName"]
+            except aws_error_utils.catch_aws_error("ResourceNotFoundException"):
+                return None
+        else:
+            raise ValueError(f"Unknown principal type {principal_type}")
+    return lookup_principal_name
+
 def _flatten(list_of_lists):
     return list(itertools.chain(*list_of_lists))
 
@@ -106,9 +186,9 @@ def _process_target(target):
     if isinstance(target, numbers.Number):
         return [("AWS_ACCOUNT", format_account_id(target))]
     if isinstance(target, str):
-        if re.match(r"^\d+$", target):
+        if _ACCOUNT_ID_PATTERN.match(target):
             return [("AWS_ACCOUNT", format_account_id(target))]
-        elif re.match(r"^r-[a-z0-9]{4,32}$", target) or re.match(r"^ou-[a-z0-9]{4,32}-[a-z0-9]{8,32}$", target):
+        elif _ROOT_ID_PATTERN.match(target) or _OU_ID_PATTERN.match(target):
             return [("AWS_OU", target)]
         else:
             raise TypeError(f"Invalid target {target}")
@@ -125,10 +205,7 @@ def _get_account_iterator(target, context: _Context):
     def target_iterator():
         target_name = None
         if context.get_target_names:
-            organizations_client = context.session.client("organizations")
-            account = organizations_client.describe_account(AccountId=target[1])["Account"]
-            if account.get("Name"):
-                target_name = account["Name"]
+            target_name = context.lookup_account_name(target[1])
         value = (*target, target_name)
         if not _filter(context.filter_cache, value[1], context.target_filter, value):
             LOGGER.debug(f"Account is filtered: {value}")
@@ -198,13 +275,7 @@ def _get_single_permission_set_iterator(permission_set, context: _Context):
         if not context.get_permission_set_names:
             permission_set_name = None
         else:
-            sso_admin_client = context.session.client("sso-admin")
-            response = sso_admin_client.describe_permission_set(
-                InstanceArn=context.ids.instance_arn,
-                PermissionSetArn=permission_set_arn
-            )
-            LOGGER.debug(f"DescribePermissionSet response: {response}")
-            permission_set_name = response["PermissionSet"]["Name"]
+            permission_set_name = context.lookup_permission_set_name(permission_set_arn)
 
         if not _filter(context.filter_cache, permission_set_arn, context.permission_set_filter, (permission_set_arn, permission_set_name)):
             LOGGER.debug(f"Single permission set is filtered: {(permission_set_id, permission_set_name)}")
@@ -231,14 +302,7 @@ def _get_all_permission_sets_iterator(context: _Context):
                 if not context.get_permission_set_names:
                     permission_set_name = None
                 else:
-                    if permission_set_arn not in context.cache:
-                        response = sso_admin_client.describe_permission_set(
-                            InstanceArn=context.ids.instance_arn,
-                            PermissionSetArn=permission_set_arn
-                        )
-                        LOGGER.debug(f"DescribePermissionSet response: {response}")
-                        context.cache[permission_set_arn] = response["PermissionSet"]["Name"]
-                    permission_set_name = context.cache[permission_set_arn]
+                    permission_set_name = context.lookup_permission_set_name(permission_set_arn)
 
                 if not _filter(context.filter_cache, permission_set_arn, context.permission_set_filter, (permission_set_arn, permission_set_name)):
                     LOGGER.debug(f"Permission set is filtered: {(permission_set_id, permission_set_name)}")
@@ -258,19 +322,18 @@ def _get_permission_set_iterator(context: _Context):
         LOGGER.debug("Iterating for all permission sets")
         return _get_all_permission_sets_iterator(context)
 
-def _get_principal_iterator(context: _Context):
-    def principal_iterator(
-            target_type, target_id, target_name,
-            permission_set_arn, permission_set_id, permission_set_name):
+def _get_account_assignments_fetcher(context: _Context):
+    # clients are safe to share across threads, but must be created up front
+    sso_admin_client = context.session.client("sso-admin", config=get_concurrent_client_config(context.max_workers))
+
+    def fetch_account_assignments(instance_arn, target_type, target_id, permission_set_arn):
         if target_type != "AWS_ACCOUNT":
             raise TypeError(f"Unsupported target type {target_type}")
 
-        sso_admin_client = context.session.client("sso-admin")
-        identity_store_client = context.session.client("identitystore")
-
+        account_assignments = []
         assignments_paginator = sso_admin_client.get_paginator("list_account_assignments")
         for response in assignments_paginator.paginate(
-                InstanceArn=context.ids.instance_arn,
+                InstanceArn=instance_arn,
                 AccountId=target_id,
                 PermissionSetArn=permission_set_arn):
             LOGGER.debug(f"ListAccountAssignments for {target_id} {permission_set_arn.split('/')[-1]} page: {response}")
@@ -278,59 +341,62 @@ def _get_principal_iterator(context: _Context):
             if not response["AccountAssignments"] and not "NextToken" in response:
                 LOGGER.debug(f"No assignments for {target_id} {permission_set_arn.split('/')[-1]}")
 
-            for assignment in response["AccountAssignments"]:
-                principal_type = assignment["PrincipalType"]
-                principal_id = assignment["PrincipalId"]
-                LOGGER.debug(f"Visiting principal {principal_type}:{principal_id}")
+            account_assignments.extend(response["AccountAssignments"])
+        return account_assignments
+    return fetch_account_assignments
+
+def _prefetch_permission_set_names(context: _Context, executor):
+    instance_arn = context.ids.instance_arn
+    sso_admin_client = context.session.client("sso-admin")
+    permission_set_arns = []
+    permission_sets_paginator = sso_admin_client.get_paginator("list_permission_sets")
+    for response in permission_sets_paginator.paginate(InstanceArn=instance_arn):
+        LOGGER.debug(f"ListPermissionSets page: {response}")
+        permission_set_arns.extend(response.get("PermissionSets", []))
+
+    def prefetch(permission_set_arn):
+        try:
+            context.lookup_permission_set_name(permission_set_arn)
+        except ClientError:
+            # not cached, so it's retried (and any error raised) if the permission set is visited
+            LOGGER.debug(f"Failed to prefetch name for {permission_set_arn}", exc_info=True)
+
+    LOGGER.debug(f"Prefetching names for {len(permission_set_arns)} permission sets")
+    for _ in executor.map(prefetch, permission_set_arns):
+        pass
 
-                if context.principal:
-                    for principal in context.principal:
-                        type_matches = (principal[0] is None or principal[0] != principal_type)
-                        if type_matches and principal[1] == principal_id:
-                            LOGGER.debug(f"Found principal {principal_type}:{principal_id}")
-                            break
-                    else:
-                        LOGGER.debug(f"Principal {principal_type}:{principal_id} does not match principals")
-                        continue
-
-                principal_key = (principal_type, principal_id)
-                if not context.get_principal_names:
-                    principal_name = None
+def _get_principal_iterator(context: _Context):
+    def principal_iterator(account_assignments):
+        for assignment in account_assignments:
+            principal_type = assignment["PrincipalType"]
+            principal_id = assignment["PrincipalId"]
+            LOGGER.debug(f"Visiting principal {principal_type}:{principal_id}")
+
+            if context.principal:
+                for principal in context.principal:
+                    type_matches = (principal[0] is None or principal[0] != principal_type)
+                    if type_matches and principal[1] == principal_id:
+                        LOGGER.debug(f"Found principal {principal_type}:{principal_id}")
+                        break
                 else:
-                    if principal_key not in context.cache:
-                        if principal_type == "GROUP":
-                            try:
-                                response = identity_store_client.describe_group(
-                                    IdentityStoreId=context.ids.identity_store_id,
-                                    GroupId=principal_id
-                                )
-                                LOGGER.debug(f"DescribeGroup response: {response}")
-                                context.cache[principal_key] = response["DisplayName"]
-                            except aws_error_utils.catch_aws_error("ResourceNotFoundException"):
-                                context.cache[principal_key] = None
-                        elif principal_type == "USER":
-                            try:
-                                response = identity_store_client.describe_user(
-                                    IdentityStoreId=context.ids.identity_store_id,
-                                    UserId=principal_id
-                                )
-                                LOGGER.debug(f"DescribeUser response: {response}")
-                                context.cache[principal_key] = response["UserName"]
-                            except aws_error_utils.catch_aws_error("ResourceNotFoundException"):
-                                context.cache[principal_key] = None
-                        else:
-                            raise ValueError(f"Unknown principal type {principal_type}")
-                    principal_name = context.cache[principal_key]
-
-                if not _filter(context.filter_cache, principal_key, context.principal_filter, (principal_type, principal_id, principal_name)):
-                    if context.principal:
-                        LOGGER.debug(f"Principal is filtered: {principal_type}:{principal_id}")
-                    else:
-                        LOGGER.debug(f"Principal is filtered: {principal_type}:{principal_id}")
+                    LOGGER.debug(f"Principal {principal_type}:{principal_id} does not match principals")
                     continue
 
-                LOGGER.debug(f"Visiting principal: {principal_type}:{principal_id}")
-                yield principal_type, principal_id, principal_name
+            principal_key = (principal_type, principal_id)
+            if not context.get_principal_names:
+                principal_name = None
+            else:
+                principal_name = context.lookup_principal_name(principal_type, principal_id)
+
+            if not _filter(context.filter_cache, principal_key, context.principal_filter, (principal_type, principal_id, principal_name)):
+                if context.principal:
+                    LOGGER.debug(f"Principal is filtered: {principal_type}:{principal_id}")
+                else:
+                    LOGGER.debug(f"Principal is filtered: {principal_type}:{principal_id}")
+                continue
+
+            LOGGER.debug(f"Visiting principal: {principal_type}:{principal_id}")
+            yield principal_type, principal_id, principal_name
     return principal_iterator
 
 Assignment = collections.namedtuple("Assignment", [
@@ -358,7 +424,8 @@ def list_assignments(
         get_principal_names=False,
         get_permission_set_names=False,
         get_target_names=False,
-        ou_recursive=False):
+        ou_recursive=False,
+        max_workers=None):
     """Iterate over Identity Center assignments.
 
     Args:
@@ -383,6 +450,8 @@ def list_assignments(
         get_target_names (bool): Retrieve names for targets in assignments.
         ou_recursive (bool): Set to True if an OU is provided as a target to get all accounts
             including those in child OUs.
+        max_workers (int): If set, list the assignments for this many permission sets
+            in an account concurrently.
 
     Returns:
         An iterator over Assignment namedtuples
@@ -402,6 +471,7 @@ def list_assignments(
         get_permission_set_names=get_permission_set_names,
         get_target_names=get_target_names,
         ou_recursive=ou_recursive,
+        max_workers=max_workers,
     )
 
 def _list_assignments(
@@ -416,13 +486,30 @@ def _list_assignments(
         get_principal_names=False,
         get_permission_set_names=False,
         get_target_names=False,
-        ou_recursive=False):
+        ou_recursive=False,
+        max_workers=None):
 
     principal = _process_principal(principal)
     permission_set = _process_permission_set(ids, permission_set)
     target = _process_target(target)
 
-    cache = {}
+    # the name lookups are cached for the duration of this listing
+    if get_target_names and target:
+        account_count = sum(1 for target_type, _ in target if target_type == "AWS_ACCOUNT")
+        lookup_account_name = _get_account_name_lookup(session, account_count)
+    else:
+        lookup_account_name = None
+
+    if get_permission_set_names:
+        lookup_permission_set_name = _get_permission_set_name_lookup(session, ids, config=get_concurrent_client_config(max_workers))
+    else:
+        lookup_permission_set_name = None
+
+    if get_principal_names:
+        lookup_principal_name = _get_principal_name_lookup(session, ids)
+    else:
+        lookup_principal_name = None
+
     filter_cache = {}
 
     context = _Context(
@@ -438,7 +525,10 @@ def _list_assignments(
         get_permission_set_names=get_permission_set_names,
         get_target_names=get_target_names,
         ou_recursive=ou_recursive,
-        cache=cache,
+        max_workers=max_workers,
+        lookup_account_name=lookup_account_name,
+        lookup_permission_set_name=lookup_permission_set_name,
+        lookup_principal_name=lookup_principal_name,
         filter_cache=filter_cache,
     )
 
@@ -446,27 +536,48 @@ def _list_assignments(
 
     permission_set_iterator = _get_permission_set_iterator(context)
 
+    fetch_account_assignments = _get_account_assignments_fetcher(context)
+
     principal_iterator = _get_principal_iterator(context)
 
-    for target_type, target_id, target_name in target_iterator():
-        for permission_set_arn, permission_set_id, permission_set_name, in permission_set_iterator(target_type, target_id, target_name):
-            for principal_type, principal_id, principal_name in principal_iterator(
-                    target_type, target_id, target_name,
-                    permission_set_arn, permission_set_id, permission_set_name):
-
-                assignment = Assignment(
-                    ids.instance_arn,
-                    principal_type,
-                    principal_id,
-                    principal_name,
-                    permission_set_arn,
-                    permission_set_name,
-                    target_type,
-                    target_id,
-                    target_name,
-                )
-                LOGGER.debug(f"Visiting assignment: {assignment}")
-                yield assignment
+    def assignment_iterator(map_func):
+        for target_type, target_id, target_name in target_iterator():
+            permission_sets = list(permission_set_iterator(target_type, target_id, target_name))
+            if not permission_sets:
+                continue
+            # resolved here, so the workers don't look it up concurrently
+            instance_arn = ids.instance_arn
+            account_assignments_list = map_func(
+                lambda permission_set: fetch_account_assignments(instance_arn, target_type, target_id, permission_set[0]),
+                permission_sets)
+            for (permission_set_arn, permission_set_id, permission_set_name), account_assignments in zip(permission_sets, account_assignments_list):
+                for principal_type, principal_id, principal_name in principal_iterator(account_assignments):
+
+                    assignment = Assignment(
+                        instance_arn,
+                        principal_type,
+                        principal_id,
+                        principal_name,
+                        permission_set_arn,
+                        permission_set_name,
+                        target_type,
+                        target_id,
+                        target_name,
+                    )
+                    LOGGER.debug(f"Visiting assignment: {assignment}")
+                    yield assignment
+
+    if not max_workers:
+        yield from assignment_iterator(map)
+        return
+
+    # the API calls are network-bound, so the permission sets for each account are
+    # listed concurrently, while names and filters are still handled in order here
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        if get_permission_set_names and not context.permission_set and not context.target:
+            # every account is visited, so nearly every permission set name will be needed
+            _prefetch_permission_set_names(context, executor)
+        yield from assignment_iterator(executor.map)
 
 if __name__ == "__main__":
     import boto3
@@ -0,0 +1,31 @@
+# Copyright 2022 Ben Kehoe
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+import typing
+
+from botocore.config import Config
+
+def get_concurrent_client_config(max_workers: typing.Optional[int], **kwargs) -> typing.Optional[Config]:
+    """Return the config for a client shared by max_workers threads, or None if max_workers is not set.
+
+    The connection pool is sized for the workers, and retries are increased
+    for the throttling that concurrent calls can cause.
+    Other keyword arguments are passed through to the Config.
+    """
+    if not max_workers:
+        return None
+    return Config(
+        max_pool_connections=max(max_workers, 10),
+        retries={"mode": "standard", "max_attempts": 10},
+        **kwargs
+    )
@@ -184,7 +184,8 @@ def find_all_instances(
     })
     config_instances = _get_all_instances_from_config(session.full_config)
 
-    LOGGER.debug(f"Found instances in config: {SSOInstance.to_strs(config_instances, region=True)}")
+    if LOGGER.isEnabledFor(logging.DEBUG):
+        LOGGER.debug(f"Found instances in config: {SSOInstance.to_strs(config_instances, region=True)}")
 
     filtered_config_instances = list(i for i in config_instances if i not in unique_instances)
     unique_instances.extend(filtered_config_instances)
@@ -258,7 +259,8 @@ def find_instances(
     })
     all_instances = _get_all_instances_from_config(session.full_config)
 
-    LOGGER.debug(f"Found instances: {SSOInstance.to_strs(all_instances, region=True)}")
+    if LOGGER.isEnabledFor(logging.DEBUG):
+        LOGGER.debug(f"Found instances: {SSOInstance.to_strs(all_instances, region=True)}")
 
     if not specifier:
         LOGGER.debug("No specifier, returning all instances")
@@ -273,6 +275,7 @@ def find_instances(
         else:
             LOGGER.debug(f"Instance {instance} {reason}")
 
-    LOGGER.debug(f"Matching instances: {SSOInstance.to_strs(instances)}")
+    if LOGGER.isEnabledFor(logging.DEBUG):
+        LOGGER.debug(f"Matching instances: {SSOInstance.to_strs(instances)}")
 
     return instances, specifier, all_instances
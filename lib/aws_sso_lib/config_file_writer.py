@@ -29,10 +29,7 @@ def process_profile_name(profile_name):
         profile_name = shlex.quote(profile_name)
     return profile_name
 
-def write_values(session, profile_name, values, existing_config_action=None, config_file_writer=None):
-    if not config_file_writer:
-        config_file_writer = ConfigFileWriter()
-
+def _split_values(profile_name, values):
     new_values = values.copy()
 
     # The access_key/secret_key are now *always* written to the shared
@@ -47,9 +44,22 @@ def write_values(session, profile_name, values, existing_config_action=None, con
         if credential_key in new_values:
             credential_file_values[credential_key] = new_values.pop(
                 credential_key)
+    if credential_file_values and profile_name is not None:
+        credential_file_values['__section__'] = profile_name
+
+    if new_values:
+        section = 'profile {}'.format(process_profile_name(profile_name))
+        new_values['__section__'] = section
+
+    return credential_file_values, new_values
+
+def write_values(session, profile_name, values, existing_config_action=None, config_file_writer=None):
+    if not config_file_writer:
+        config_file_writer = ConfigFileWriter()
+
+    credential_file_values, new_values = _split_values(profile_name, values)
+
     if credential_file_values:
-        if profile_name is not None:
-            credential_file_values['__section__'] = profile_name
         shared_credentials_filename = os.path.expanduser(
             session.get_config_variable('credentials_file'))
         config_file_writer.update_config(
@@ -59,11 +69,37 @@ def write_values(session, profile_name, values, existing_config_action=None, con
     if new_values:
         config_filename = os.path.expanduser(
             session.get_config_variable('config_file'))
-
-        section = 'profile {}'.format(process_profile_name(profile_name))
-        new_values['__section__'] = section
         config_file_writer.update_config(new_values, config_filename, existing_config_action)
 
+def write_profiles(session, profile_values, existing_config_action=None, config_file_writer=None):
+    """Write values for many profiles, reading and writing each file once.
+
+    profile_values is an iterable of (profile name, values) pairs.
+    """
+    if not config_file_writer:
+        config_file_writer = ConfigFileWriter()
+
+    credential_file_values_list = []
+    new_values_list = []
+    for profile_name, values in profile_values:
+        credential_file_values, new_values = _split_values(profile_name, values)
+        if credential_file_values:
+            credential_file_values_list.append(credential_file_values)
+        if new_values:
+            new_values_list.append(new_values)
+
+    if credential_file_values_list:
+        shared_credentials_filename = os.path.expanduser(
+            session.get_config_variable('credentials_file'))
+        config_file_writer.update_configs(
+            credential_file_values_list,
+            shared_credentials_filename)
+
+    if new_values_list:
+        config_filename = os.path.expanduser(
+            session.get_config_variable('config_file'))
+        config_file_writer.update_configs(new_values_list, config_filename, existing_config_action)
+
 
 class ConfigFileWriter(object):
     SECTION_REGEX = re.compile(r'^\s*\[(?P<header>[^]]+)\]')
@@ -121,6 +157,33 @@ class ConfigFileWriter(object):
         except SectionNotFoundError:
             self._write_new_section(section_name, new_values, config_filename)
 
+    def update_configs(self, new_values_list, config_filename, existing_config_action=None):
+        """Update multiple sections of a config file.
+
+        Each item in ``new_values_list`` is handled as in ``update_config``,
+        but the file is only read and written once.
+        """
+        if existing_config_action is None:
+            existing_config_action = "overwrite"
+        if os.path.isfile(config_filename):
+            with open(config_filename, 'r') as f:
+                contents = f.readlines()
+        else:
+            self._create_file(config_filename)
+            contents = []
+        for new_values in new_values_list:
+            new_values = new_values.copy()
+            section_name = new_values.pop('__section__', 'default')
+            try:
+                self._update_section_contents(contents, section_name, new_values, existing_config_action)
+            except SectionNotFoundError:
+                contents.extend(['\n', '[%s]\n' % section_name])
+                self._insert_new_values(line_number=len(contents) - 1,
+                                        contents=contents,
+                                        new_values=new_values)
+        with open(config_filename, 'w') as f:
+            f.write(''.join(contents))
+
     def _create_file(self, config_filename):
         # Create the file as well as the parent dir if needed.
         dirname = os.path.split(config_filename)[0]
@@ -210,7 +273,13 @@ class ConfigFileWriter(object):
             else:
                 new_contents.append('%s%s = %s\n' % (indent, key, value))
             del new_values[key]
-        contents.insert(line_number + 1, ''.join(new_contents))
+        # the line being inserted after may be the unterminated last line of the
+        # file, even if more sections have been appended since it was read
+        if new_contents and line_number < len(contents) and not contents[line_number].endswith('\n'):
+            contents[line_number] += '\n'
+        # insert line by line, so the contents can be searched again
+        # for further updates
+        contents[line_number + 1:line_number + 1] = new_contents
 
     def _matches_section(self, match, section_name):
         parts = section_name.split(' ')
@@ -12,8 +12,11 @@
 # language governing permissions and limitations under the License.
 
 import numbers
+import typing
 
-from .lookup import Ids
+if typing.TYPE_CHECKING:
+    # lookup imports this module, so Ids is only imported for type checking
+    from .lookup import Ids
 
 class FormatError(Exception):
     pass
@@ -25,7 +28,7 @@ def format_account_id(account_id):
         account_id = account_id.rjust(12, "0")
     return account_id
 
-def format_permission_set_arn(ids: Ids, permission_set_id, raise_on_unknown=False):
+def format_permission_set_arn(ids: "Ids", permission_set_id, raise_on_unknown=False):
     if isinstance(permission_set_id, str):
         if permission_set_id.startswith('arn'):
             return permission_set_id
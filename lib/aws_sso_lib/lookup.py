@@ -207,7 +207,7 @@ class Ids:
 _CACHE_KEY_PREFIX_GROUP_ID = "group#id#"
 _CACHE_KEY_PREFIX_GROUP_NAME = "group#name#"
 
-def lookup_group_by_id(session: boto3.Session, ids: Ids, group_id, *, cache=None):
+def lookup_group_by_id(session: boto3.Session, ids: Ids, group_id, *, cache=None, client=None):
     if cache is None:
         cache = {}
 
@@ -221,7 +221,7 @@ def lookup_group_by_id(session: boto3.Session, ids: Ids, group_id, *, cache=None
 
     LOGGER.debug(f"Looking up group {group_id}")
 
-    identity_store = session.client('identitystore')
+    identity_store = client or session.client('identitystore')
     try:
         group = identity_store.describe_group(IdentityStoreId=ids.identity_store_id, GroupId=group_id)
         group.pop("ResponseMetadata", None)
@@ -238,7 +238,7 @@ def lookup_group_by_id(session: boto3.Session, ids: Ids, group_id, *, cache=None
 
     return group
 
-def lookup_group_by_name(session: boto3.Session, ids: Ids, group_name, *, cache=None):
+def lookup_group_by_name(session: boto3.Session, ids: Ids, group_name, *, cache=None, client=None):
     if cache is None:
         cache = {}
 
@@ -252,7 +252,7 @@ def lookup_group_by_name(session: boto3.Session, ids: Ids, group_name, *, cache=
 
     LOGGER.debug(f"Looking up group {group_name}")
 
-    identity_store = session.client('identitystore')
+    identity_store = client or session.client('identitystore')
     filters=[{'AttributePath': 'DisplayName', 'AttributeValue': group_name}]
     response = identity_store.list_groups(IdentityStoreId=ids.identity_store_id, Filters=filters)
 
@@ -276,7 +276,7 @@ def lookup_group_by_name(session: boto3.Session, ids: Ids, group_name, *, cache=
 _CACHE_KEY_PREFIX_USER_ID = "user#id#"
 _CACHE_KEY_PREFIX_USER_NAME = "user#name#"
 
-def lookup_user_by_id(session: boto3.Session, ids: Ids, user_id, *, cache=None):
+def lookup_user_by_id(session: boto3.Session, ids: Ids, user_id, *, cache=None, client=None):
     if cache is None:
         cache = {}
 
@@ -290,7 +290,7 @@ def lookup_user_by_id(session: boto3.Session, ids: Ids, user_id, *, cache=None):
 
     LOGGER.debug(f"Looking up user {user_id}")
 
-    identity_store = session.client('identitystore')
+    identity_store = client or session.client('identitystore')
     try:
         user = identity_store.describe_user(IdentityStoreId=ids.identity_store_id, UserId=user_id)
         user.pop("ResponseMetadata", None)
@@ -307,7 +307,7 @@ def lookup_user_by_id(session: boto3.Session, ids: Ids, user_id, *, cache=None):
 
     return user
 
-def lookup_user_by_name(session: boto3.Session, ids: Ids, user_name, *, cache=None):
+def lookup_user_by_name(session: boto3.Session, ids: Ids, user_name, *, cache=None, client=None):
     if cache is None:
         cache = {}
 
@@ -322,7 +322,7 @@ def lookup_user_by_name(session: boto3.Session, ids: Ids, user_name, *, cache=No
 
     LOGGER.debug(f"Looking up user {user_name}")
 
-    identity_store = session.client('identitystore')
+    identity_store = client or session.client('identitystore')
     filters=[{'AttributePath': 'UserName', 'AttributeValue': user_name}]
     response = identity_store.list_users(IdentityStoreId=ids.identity_store_id, Filters=filters)
 
@@ -347,7 +347,7 @@ def lookup_user_by_name(session: boto3.Session, ids: Ids, user_name, *, cache=No
 _CACHE_KEY_PREFIX_PERMISSION_SET_ARN = "ps#arn#"
 _CACHE_KEY_PREFIX_PERMISSION_SET_NAME = "ps#name#"
 
-def lookup_permission_set_by_id(session: boto3.Session, ids: Ids, permission_set_id, *, cache=None):
+def lookup_permission_set_by_id(session: boto3.Session, ids: Ids, permission_set_id, *, cache=None, client=None):
     if cache is None:
         cache = {}
 
@@ -364,7 +364,9 @@ def lookup_permission_set_by_id(session: boto3.Session, ids: Ids, permission_set
 
     LOGGER.debug(f"Looking up permission set {permission_set_id}")
 
-    sso = session.client("sso-admin")
+    # a client can be passed in to reuse it across lookups, and across threads,
+    # as creating clients from the session is not thread-safe
+    sso = client or session.client("sso-admin")
 
     try:
         ps = sso.describe_permission_set(InstanceArn=ids.instance_arn, PermissionSetArn=permission_set_arn)["PermissionSet"]
@@ -380,7 +382,7 @@ def lookup_permission_set_by_id(session: boto3.Session, ids: Ids, permission_set
 
     return ps
 
-def lookup_permission_set_by_name(session: boto3.Session, ids: Ids, permission_set_name, *, cache=None):
+def lookup_permission_set_by_name(session: boto3.Session, ids: Ids, permission_set_name, *, cache=None, client=None):
     if cache is None:
         cache = {}
 
@@ -396,7 +398,7 @@ def lookup_permission_set_by_name(session: boto3.Session, ids: Ids, permission_s
     LOGGER.debug(f"Looking up permission set {permission_set_name}")
 
     found_permission_set = None
-    sso = session.client("sso-admin")
+    sso = client or session.client("sso-admin")
     paginator = sso.get_paginator('list_permission_sets')
     for ind, response in enumerate(paginator.paginate(InstanceArn=ids.instance_arn)):
         LOGGER.debug(f"ListPermissionSets page {ind+1}: {', '.join(response['PermissionSets'])}")
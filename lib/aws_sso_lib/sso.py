@@ -24,6 +24,7 @@ import uuid
 import numbers
 import typing
 import json
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
 import botocore
@@ -31,6 +32,7 @@ from botocore.credentials import JSONFileCache
 from botocore.credentials import SSOCredentialFetcher
 
 from .format import format_account_id
+from .client_config import get_concurrent_client_config
 
 from .vendored_botocore.utils import SSOTokenFetcher
 
@@ -400,7 +402,8 @@ def list_available_roles(
         account_id: typing.Union[str, int, typing.Iterable[typing.Union[str, int]]]=None,
         *,
         login: bool=False,
-        sso_cache=None) -> typing.Iterator[typing.Tuple[str, str, str]]:
+        sso_cache=None,
+        max_workers: int=None) -> typing.Iterator[typing.Tuple[str, str, str]]:
     """Iterate over the available accounts and roles the user has access to through Identity Center.
 
     Args:
@@ -410,6 +413,8 @@ def list_available_roles(
             If not set, all accounts available to the user are listed.
         login (bool): Interactively log in the user if their Identity Center credentials have expired.
         sso_cache: A dict-like object for Identity Center credential caching.
+        max_workers (int): If set, list the roles for this many accounts concurrently.
+            All accounts are listed up front, rather than as the iterator is consumed.
 
     Returns:
         An iterator that yields account id, account name, and role name.
@@ -436,6 +441,8 @@ def list_available_roles(
         region_name=sso_region,
         signature_version=botocore.UNSIGNED,
     )
+    if max_workers:
+        config = config.merge(get_concurrent_client_config(max_workers))
     client = session.create_client("sso", config=config)
 
     if account_id_list:
@@ -457,7 +464,7 @@ def list_available_roles(
                 else:
                     list_accounts_args["nextToken"] = response["nextToken"]
 
-    for account_id, account_name in account_iterator():
+    def role_name_iterator(account_id):
         list_role_args = {
             "accessToken": token["accessToken"],
             "accountId": account_id,
@@ -467,12 +474,23 @@ def list_available_roles(
             response = client.list_account_roles(**list_role_args)
 
             for role in response["roleList"]:
-                role_name = role["roleName"]
-
-                yield account_id, account_name, role_name # type: ignore
+                yield role["roleName"]
 
             next_token = response.get("nextToken")
             if not next_token:
                 break
             else:
                 list_role_args["nextToken"] = response["nextToken"]
+
+    if max_workers:
+        accounts = list(account_iterator())
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(lambda a: list(role_name_iterator(a[0])), accounts)
+            for (account_id, account_name), role_names in zip(accounts, results):
+                for role_name in role_names:
+                    yield account_id, account_name, role_name # type: ignore
+        return
+
+    for account_id, account_name in account_iterator():
+        for role_name in role_name_iterator(account_id):
+            yield account_id, account_name, role_name # type: ignore
@@ -0,0 +1,55 @@
+# Copyright 2022 Ben Kehoe
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+import pytest
+
+from aws_sso_lib.config_file_writer import ConfigFileWriter
+
+@pytest.mark.parametrize("existing_config_action", ["keep", "overwrite", "discard"])
+def test_update_configs_no_trailing_newline(tmp_path, existing_config_action):
+    config_file = tmp_path / "config"
+    config_file.write_text("[profile a]\nregion = eu-west-1")
+
+    ConfigFileWriter().update_configs([
+        {"__section__": "profile b", "region": "us-east-1"},
+        {"__section__": "profile a", "output": "json"},
+    ], str(config_file), existing_config_action=existing_config_action)
+
+    lines = config_file.read_text().splitlines()
+    assert "output = json" in lines
+    assert "[profile b]" in lines
+    assert lines[:1] == ["[profile a]"]
+    if existing_config_action == "discard":
+        assert "region = eu-west-1" not in lines
+    else:
+        assert "region = eu-west-1" in lines
+
+def test_update_configs_matches_update_config(tmp_path):
+    contents = "[default]\nregion = us-east-1\n\n[profile a]\nregion = eu-west-1"
+    new_values_list = [
+        {"__section__": "profile a", "output": "json"},
+        {"__section__": "profile b", "region": "us-west-2"},
+    ]
+
+    sequential_file = tmp_path / "sequential"
+    sequential_file.write_text(contents)
+    for new_values in new_values_list:
+        ConfigFileWriter().update_config(dict(new_values), str(sequential_file))
+
+    batch_file = tmp_path / "batch"
+    batch_file.write_text(contents)
+    ConfigFileWriter().update_configs(new_values_list, str(batch_file))
+
+    def non_blank_lines(path):
+        return [line for line in path.read_text().splitlines() if line.strip()]
+    assert non_blank_lines(batch_file) == non_blank_lines(sequential_file)